@@ -4,8 +4,18 @@ Simple Streamlit App
 Run with: streamlit run filename.py
 """
 
+import os
+
 import streamlit as st
 from datetime import datetime
+from pathlib import Path
+
+from image_cache import ImageCache
+from inquiry_queue import InquiryQueue, RateLimited
+from product_catalog import PRODUCTS, format_rands, price_list_lines, quote
+from render_profiler import RenderProfiler, render_debug_panel
+from shared_cache import open_shared_cache
+from static_fragments import compile_css, compile_section
 
 # ===== PAGE CONFIGURATION =====
 st.set_page_config(
@@ -13,9 +23,24 @@ st.set_page_config(
     layout="centered"
 )
 
+# ===== RENDER PROFILING =====
+@st.cache_resource
+def get_render_profiler():
+    """Process-wide render timings; see render_profiler.py for how to turn it on."""
+    profiler = RenderProfiler()
+    if os.environ.get("KFB_METRICS_PORT"):
+        profiler.serve(int(os.environ["KFB_METRICS_PORT"]))
+    return profiler
+
+
+render_profiler = get_render_profiler()
+profiling = RenderProfiler.enabled_for(st.query_params)
+run = render_profiler.run("business profile", enabled=profiling)
+run.page = "profile"
+
 # ===== CUSTOM CSS =====
-st.markdown("""
-<style>
+run.mark("css")
+PAGE_CSS = """
     .stApp {
         background-color: white;
         color: black;
@@ -37,8 +62,8 @@ st.markdown("""
         padding: 1rem;
         margin-bottom: 1rem;
     }
-</style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(compile_css(PAGE_CSS).markdown, unsafe_allow_html=True)
 
 # ===== BUSINESS INFO =====
 BUSINESS_NAME = "Kwazi's Fiber Bliss"
@@ -49,97 +74,171 @@ EMAIL = "KFiberBliss@gmail.com"
 INSTAGRAM = "@K_FiberBliss"
 WHATSAPP = "0662708613"
 
+# Header image: a web URL (fetched once and cached) or your own local image file
+HEADER_IMAGE = os.environ.get(
+    "KFB_HEADER_IMAGE",
+    "https://cdn-media.knitpro.eu/media/mageplaza/blog/post/brand/how-to-crochet-a-sweater-1.webp"
+)
+HEADER_IMAGE_WIDTH = 704  # width of the centered layout
+
+# Runtime files (image cache, inquiry log); KFB_DATA_DIR moves them elsewhere
+DATA_DIR = Path(os.environ.get("KFB_DATA_DIR", Path(__file__).parent / "data"))
+
 # ===== CALCULATIONS =====
 current_year = datetime.now().year
 business_years = current_year - FOUNDED_YEAR
 
 # ===== HEADER =====
-st.markdown(f'<h1 class="title">{BUSINESS_NAME}</h1>', unsafe_allow_html=True)
-st.markdown(f'<p class="tagline">{TAGLINE}</p>', unsafe_allow_html=True)
-
-# ===== OPTION 1: Use a web image URL (Recommended - no file needed) =====
-try:
-    # Using a placeholder crochet image from the web
-    st.image(
-        "https://cdn-media.knitpro.eu/media/mageplaza/blog/post/brand/how-to-crochet-a-sweater-1.webp",
-        caption="Handmade with care since 2017"
-    )
-   #st.caption("*(Placeholder image - replace with your own)*")
-except:
+run.mark("header")
+st.markdown(
+    f'<h1 class="title">{BUSINESS_NAME}</h1><p class="tagline">{TAGLINE}</p>',
+    unsafe_allow_html=True
+)
+
+# ===== HEADER IMAGE =====
+run.mark("image")
+
+
+@st.cache_resource
+def get_shared_cache():
+    """Cache shared with the other server processes; None unless KFB_CACHE_URL is set."""
+    return open_shared_cache(os.environ.get("KFB_CACHE_URL"), DATA_DIR / "shared_cache.db")
+
+
+@st.cache_resource
+def get_image_cache():
+    """Downloaded and resized images, shared by every session of this process."""
+    return ImageCache(DATA_DIR / "images", shared_cache=get_shared_cache())
+
+
+header_image = get_image_cache().get(HEADER_IMAGE, HEADER_IMAGE_WIDTH)
+if header_image is not None:
+    st.image(header_image, caption="Handmade with care since 2017")
+elif get_image_cache().failed(HEADER_IMAGE, HEADER_IMAGE_WIDTH):
     st.write("**Image could not be loaded**")
     st.write("To add your own image:")
     st.write("1. Save your image in the same folder as this script")
-    st.write("2. Use: st.image('your_image.jpg', caption='Your caption')")
+    st.write("2. Set the KFB_HEADER_IMAGE environment variable to its filename (e.g. your_image.jpg)")
+
+# ===== STATIC SECTIONS =====
+# Each section is compiled to one markdown blob per process and sent as a
+# single element. {business_years} is the only value filled in per rerun.
+ABOUT_LINES = [
+    f"**Founder:** {FOUNDER_NAME}",
+    f"**Journey:** Learned crocheting at age 8. Started business in {FOUNDED_YEAR}.",
+    "**Experience:** {business_years} years professional craftsmanship",
+    "**Specialty:** Handmade fashion and accessories",
+    "**For:** All ages seeking unique, comfortable fashion",
+]
 
-# ===== OPTION 2: Use your local image file =====
-# To use your own image file, comment out Option 1 above and uncomment below:
-# st.image("your_image_filename_here.jpg", caption="Handmade with care since 2017")
-# Make sure to replace "your_image_filename_here.jpg" with your actual filename
+ARTICLE_LINES = [
+    "**From Crochet Hooks to Lab Coats: Nokwazi's Journey**",
+    "Published July 2025 in Vibe Online",
+    "",
+    "Highlights from the article:",
+    "- First learned crocheting at age 8",
+    f"- Started business in {FOUNDED_YEAR}",
+    "- MSc in Microbiology candidate",
+    "- Research on water treatment solutions",
+    "",
+    "[Read full article](https://vibeonline.co.za/academic/from-crochet-hooks-to-lab-coats-nokwazis-journey-is-pure-fire/)",
+]
+
+PRODUCT_LINES = price_list_lines()
+
+CONTACT_LINES = [
+    f"**Email:** {EMAIL}",
+    f"**Instagram:** {INSTAGRAM}",
+    f"**WhatsApp:** {WHATSAPP}",
+    "",
+    "Shop Coming Soon!",
+]
 
 # ===== ABOUT SECTION =====
-st.markdown('<div class="section">', unsafe_allow_html=True)
-st.subheader("About")
-st.write(f"**Founder:** {FOUNDER_NAME}")
-st.write(f"**Journey:** Learned crocheting at age 8. Started business in {FOUNDED_YEAR}.")
-st.write(f"**Experience:** {business_years} years professional craftsmanship")
-st.write("**Specialty:** Handmade fashion and accessories")
-st.write("**For:** All ages seeking unique, comfortable fashion")
-st.markdown('</div>', unsafe_allow_html=True)
+run.mark("about")
+st.markdown(
+    compile_section("About", ABOUT_LINES).render(business_years=business_years),
+    unsafe_allow_html=True
+)
 
 # ===== ARTICLE =====
-st.markdown('<div class="section">', unsafe_allow_html=True)
-st.subheader("Featured Article")
-st.write("**From Crochet Hooks to Lab Coats: Nokwazi's Journey**")
-st.write("Published July 2025 in Vibe Online")
-st.write("")
-st.write("Highlights from the article:")
-st.write("- First learned crocheting at age 8")
-st.write(f"- Started business in {FOUNDED_YEAR}")
-st.write("- MSc in Microbiology candidate")
-st.write("- Research on water treatment solutions")
-st.write("")
-st.markdown('[Read full article](https://vibeonline.co.za/academic/from-crochet-hooks-to-lab-coats-nokwazis-journey-is-pure-fire/)')
-st.markdown('</div>', unsafe_allow_html=True)
+run.mark("article")
+st.markdown(compile_section("Featured Article", ARTICLE_LINES).markdown, unsafe_allow_html=True)
 
 # ===== PRODUCTS & PRICES =====
-st.markdown('<div class="section">', unsafe_allow_html=True)
-st.subheader("Products & Prices")
-
-st.write("**HATS**")
-st.write("Ruffle Hats: R250")
-st.write("Beanie Hats: R150")
-st.write("Sun Hats: R170")
-
-st.write("")
-st.write("**BIKINIS**")
-st.write("Bikini Sets: R300")
-st.write("Mix & Match: R280")
-
-st.write("")
-st.write("**TWO-PIECE SETS**")
-st.write("Youth Sets: R320")
-st.write("Seasoned Sets: R350")
-
-st.write("")
-st.write("**HANDBAGS**")
-st.write("Crochet Classy Bags: R350")
-
-st.write("")
-st.write("**Children's Discount:** R50 OFF for children under 7 years")
-st.write("Use code: KIDSBUZZ7")
-st.markdown('</div>', unsafe_allow_html=True)
+run.mark("products")
+st.markdown(compile_section("Products & Prices", PRODUCT_LINES).markdown, unsafe_allow_html=True)
+
+# ===== QUOTE =====
+run.mark("quote")
+with st.expander("Get a quote (bulk and wholesale orders welcome)"):
+    with st.form("quote_form"):
+        basket_rows = st.data_editor(
+            [
+                {"SKU": product.sku, "Product": product.name,
+                 "Price": format_rands(product.price_cents), "Quantity": 0, "Under 7": 0}
+                for product in PRODUCTS
+            ],
+            disabled=["SKU", "Product", "Price"],
+            hide_index=True,
+            key="quote_basket",
+        )
+        discount_code = st.text_input("Discount code (optional)")
+        get_quote = st.form_submit_button("Get Quote")
+
+    if get_quote:
+        basket = [
+            (row["SKU"], int(row["Quantity"] or 0), int(row["Under 7"] or 0))
+            for row in basket_rows
+            if row["Quantity"]
+        ]
+        try:
+            result = quote(basket, discount_code)
+        except (KeyError, ValueError) as error:
+            st.warning(str(error.args[0]))
+        else:
+            if not result["lines"]:
+                st.info("Enter a quantity for at least one product.")
+            else:
+                st.table([
+                    {
+                        "Product": line["product"],
+                        "Qty": line["quantity"],
+                        "Unit": format_rands(line["unit_price_cents"]),
+                        "Discount": format_rands(line["discount_cents"]),
+                        "Total": format_rands(line["total_cents"]),
+                    }
+                    for line in result["lines"]
+                ])
+                st.write(
+                    f"**Subtotal:** {format_rands(result['subtotal_cents'])} · "
+                    f"**Discount:** {format_rands(result['discount_cents'])} · "
+                    f"**Total:** {format_rands(result['total_cents'])}"
+                )
 
 # ===== CONTACT =====
-st.markdown('<div class="section">', unsafe_allow_html=True)
-st.subheader("Contact")
-st.write(f"**Email:** {EMAIL}")
-st.write(f"**Instagram:** {INSTAGRAM}")
-st.write(f"**WhatsApp:** {WHATSAPP}")
-st.write("")
-st.write("Shop Coming Soon!")
-st.markdown('</div>', unsafe_allow_html=True)
+run.mark("contact")
+st.markdown(compile_section("Contact", CONTACT_LINES).markdown, unsafe_allow_html=True)
 
 # ===== INQUIRY FORM =====
+run.mark("inquiry form")
+
+
+@st.cache_resource
+def get_inquiry_queue():
+    """Rate limiter, dedup window and background log writer shared by all visitors."""
+    return InquiryQueue(DATA_DIR / "inquiries.jsonl")
+
+
+def client_ip():
+    """Best-effort address of the visitor, used only for rate limiting."""
+    ip = getattr(st.context, "ip_address", None)
+    if ip:
+        return ip
+    forwarded = st.context.headers.get("X-Forwarded-For", "")
+    return forwarded.split(",")[0].strip() or None
+
+
 st.markdown('<div class="section">', unsafe_allow_html=True)
 st.subheader("Send Inquiry")
 
@@ -154,13 +253,35 @@ with st.form("inquiry_form"):
     submit = st.form_submit_button("Send")
     
     if submit and name and email_input and message:
-        st.success(f"Thank you {name}! We'll contact you soon.")
+        inquiry = {
+            "name": name,
+            "email": email_input,
+            "product_interest": product_interest,
+            "message": message,
+        }
+        try:
+            is_new = get_inquiry_queue().submit(inquiry, ip=client_ip())
+        except RateLimited as error:
+            st.warning(str(error))
+        else:
+            if is_new:
+                st.success(f"Thank you {name}! We'll contact you soon.")
+            else:
+                st.info(f"Thanks {name}, we already have this message and will reply soon.")
     elif submit:
         st.warning("Please fill in all fields.")
 st.markdown('</div>', unsafe_allow_html=True)
 
 # ===== FOOTER =====
-st.write("---")
-st.write(f"© {FOUNDED_YEAR}-{current_year} Kwazi's Fiber Bliss")
-st.write("Crafting since childhood • Business since 2017")
+run.mark("footer")
+FOOTER_LINES = [
+    "---",
+    f"© {FOUNDED_YEAR}-{{current_year}} Kwazi's Fiber Bliss",
+    "Crafting since childhood • Business since 2017",
+]
+st.markdown(compile_section("", FOOTER_LINES, css_class=None).render(current_year=current_year))
 
+# ===== PROFILING OUTPUT =====
+run.finish()
+if profiling:
+    render_debug_panel(st, render_profiler)
@@ -0,0 +1,249 @@
+"""
+Kwazi's Fiber Bliss - Application Import / Export
+Streams applications between the store and CSV or Parquet files in
+fixed-size chunks, so the full dataset is never held in memory
+
+Nightly use from the command line, e.g.:
+    python application_io.py export applications.parquet --status "Under Review"
+    python application_io.py import hr_updates.csv
+"""
+
+import argparse
+import csv
+import io
+import sys
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+from application_store import COLUMNS, ApplicationStore
+from status_transitions import STATUSES
+
+CHUNK_SIZE = 10_000
+FORMATS = ("csv", "parquet")
+# Columns an import file must have; the rest are optional
+REQUIRED_IMPORT_COLUMNS = ["Application ID", "Applicant", "Position", "Status", "Applied Date"]
+
+
+def detect_format(path):
+    suffix = Path(str(path)).suffix.lower().lstrip(".")
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported file type {suffix!r}; use .csv or .parquet")
+    return suffix
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        (column, pa.date32() if column == "Applied Date" else pa.string()) for column in COLUMNS
+    ])
+
+
+# ===== EXPORT =====
+def export_applications(store, target, fmt=None, statuses=None, positions=None,
+                        date_from=None, date_to=None, chunk_size=CHUNK_SIZE):
+    """Write matching applications to ``target`` (a path or binary file object).
+
+    Returns the number of rows written.
+    """
+    fmt = fmt or detect_format(target)
+    chunks = store.iter_chunks(statuses, positions, date_from, date_to, chunk_size)
+    if fmt == "csv":
+        return _export_csv(chunks, target)
+    if fmt == "parquet":
+        return _export_parquet(chunks, target)
+    raise ValueError(f"Unsupported format {fmt!r}")
+
+
+def _export_csv(chunks, target):
+    owns_file = isinstance(target, (str, Path))
+    raw = open(target, "wb") if owns_file else target
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    written = 0
+    try:
+        writer = csv.writer(text)
+        writer.writerow(COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+            written += len(rows)
+        text.flush()
+    finally:
+        text.detach()
+        if owns_file:
+            raw.close()
+    return written
+
+
+def _export_parquet(chunks, target):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    date_index = COLUMNS.index("Applied Date")
+    written = 0
+    with pq.ParquetWriter(target, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            arrays = [
+                pa.array([date.fromisoformat(value) for value in values], pa.date32())
+                if i == date_index else pa.array(values, pa.string())
+                for i, values in enumerate(columns)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            written += len(rows)
+    return written
+
+
+# ===== IMPORT =====
+@dataclass(frozen=True)
+class RejectedRow:
+    """A row an import left out: where it is in the file and what was wrong with it."""
+
+    where: str
+    app_id: str
+    reason: str
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    """How many rows an import wrote, and the rows it rejected instead."""
+
+    imported: int
+    rejected: list = field(default_factory=list)
+
+
+def _check_record(record):
+    """Convert the Applied Date in place; return why ``record`` can't be imported, or None."""
+    if not str(record["Application ID"] or "").strip():
+        return "no Application ID"
+    if record["Status"] not in STATUSES:
+        return f"unknown status {record['Status']!r}; expected one of {', '.join(STATUSES)}"
+    applied = record["Applied Date"]
+    if not isinstance(applied, date):
+        try:
+            record["Applied Date"] = date.fromisoformat(str(applied)[:10])
+        except ValueError:
+            return f"applied date {applied!r} isn't a YYYY-MM-DD date"
+    return None
+
+
+def _check_columns(columns):
+    missing = [column for column in REQUIRED_IMPORT_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Import file is missing columns: {', '.join(missing)}")
+    return [column for column in columns if column in COLUMNS]
+
+
+def _read_csv_chunks(source, chunk_size):
+    """Yield ``(records, rejected)`` per chunk; rows are located by their line in the file."""
+    owns_file = isinstance(source, (str, Path))
+    raw = open(source, "rb") if owns_file else source
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        columns = _check_columns(reader.fieldnames or [])
+        chunk, rejected = [], []
+        for row in reader:
+            record = {column: row[column] for column in columns}
+            reason = _check_record(record)
+            if reason is None:
+                chunk.append(record)
+            else:
+                rejected.append(RejectedRow(f"line {reader.line_num}", record["Application ID"] or "", reason))
+            if len(chunk) >= chunk_size:
+                yield chunk, rejected
+                chunk, rejected = [], []
+        if chunk or rejected:
+            yield chunk, rejected
+    finally:
+        text.detach()
+        if owns_file:
+            raw.close()
+
+
+def _read_parquet_chunks(source, chunk_size):
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(source)
+    columns = _check_columns(parquet.schema_arrow.names)
+    row_number = 0
+    for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+        records, rejected = [], []
+        for record in batch.to_pylist():
+            row_number += 1
+            reason = _check_record(record)
+            if reason is None:
+                records.append(record)
+            else:
+                rejected.append(RejectedRow(f"row {row_number}", record["Application ID"] or "", reason))
+        yield records, rejected
+
+
+def import_applications(store, source, fmt=None, chunk_size=CHUNK_SIZE):
+    """Upsert applications from ``source`` (a path or binary file object) by Application ID.
+
+    Each chunk is checked, then committed in its own transaction, and status
+    changes are recorded in the audit log with the source's name as the
+    reason. Rows with a status the workflow doesn't know, an Applied Date
+    that isn't YYYY-MM-DD or no Application ID are left out and listed in
+    the ImportResult with their line (CSV) or row (Parquet) number.
+    """
+    name = str(getattr(source, "name", source))
+    fmt = fmt or detect_format(name)
+    if fmt == "csv":
+        chunks = _read_csv_chunks(source, chunk_size)
+    elif fmt == "parquet":
+        chunks = _read_parquet_chunks(source, chunk_size)
+    else:
+        raise ValueError(f"Unsupported format {fmt!r}")
+    imported = 0
+    rejected = []
+    try:
+        for records, bad_rows in chunks:
+            rejected.extend(bad_rows)
+            imported += store.upsert_many(records, notify=False, reason=f"imported from {Path(name).name}")
+    finally:
+        store.finish_bulk_load()
+    return ImportResult(imported, rejected)
+
+
+# ===== COMMAND LINE =====
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export KFB applications.")
+    parser.add_argument("--db", default=str(Path(__file__).parent / "data" / "applications.db"))
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write applications to a .csv or .parquet file")
+    export.add_argument("path")
+    export.add_argument("--status", action="append", help="repeat to include several")
+    export.add_argument("--position", action="append", help="repeat to include several")
+    export.add_argument("--from", dest="date_from", type=date.fromisoformat, help="YYYY-MM-DD")
+    export.add_argument("--to", dest="date_to", type=date.fromisoformat, help="YYYY-MM-DD")
+
+    load = commands.add_parser("import", help="upsert applications from a .csv or .parquet file")
+    load.add_argument("path")
+
+    args = parser.parse_args(argv)
+    store = ApplicationStore(args.db)
+    try:
+        if args.command == "export":
+            count = export_applications(
+                store, args.path, statuses=args.status, positions=args.position,
+                date_from=args.date_from, date_to=args.date_to, chunk_size=args.chunk_size,
+            )
+            print(f"Exported {count} applications to {args.path}")
+        else:
+            result = import_applications(store, args.path, chunk_size=args.chunk_size)
+            print(f"Imported {result.imported} applications from {args.path}")
+            for row in result.rejected:
+                print(f"Skipped {row.where} ({row.app_id or 'no ID'}): {row.reason}", file=sys.stderr)
+            if result.rejected:
+                sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
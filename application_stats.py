@@ -0,0 +1,101 @@
+"""
+Kwazi's Fiber Bliss - Application Statistics
+Running totals for the Applications dashboard, kept up to date as
+applications are submitted and their status changes
+"""
+
+import threading
+from collections import Counter
+
+SHARED_COUNTS_TTL = 600.0         # seconds counts shared with other processes are kept
+INVALIDATE_WITHIN = 1.0           # writes closer together than this send one invalidation
+
+
+class ApplicationStats:
+    """Per-status and per-position counters for the application store.
+
+    The counters are loaded once from the store and then adjusted by the
+    store's listener calls, so reading them never touches the database.
+    With a ``shared_cache``, a reload reuses counts another server process
+    already computed for the same store generation, and this process's
+    changes tell the other processes to reload, at most once every
+    ``INVALIDATE_WITHIN`` seconds however many writes there were. ``warm`` is a
+    ``snapshot_state()`` saved by an earlier process; it is used instead
+    of counting the store if nothing was written since.
+    """
+
+    def __init__(self, store, shared_cache=None, warm=None):
+        self._lock = threading.Lock()
+        self.store = store
+        self.shared_cache = shared_cache
+        if warm is not None and warm[0] == store.generation():
+            self._set_counts(warm[1:])
+        else:
+            self.bulk_loaded()
+        store.add_listener(self)
+        if shared_cache is not None:
+            shared_cache.subscribe("application-stats", self.bulk_loaded)
+
+    # ===== READS =====
+    def refresh_if_stale(self):
+        """Reload if another process (such as the import CLI) changed the store."""
+        if self.shared_cache is not None:
+            self.shared_cache.poll()
+        if self.store.changed_elsewhere():
+            self.bulk_loaded()
+
+    def status_count(self, status):
+        return self.by_status.get(status, 0)
+
+    def position_count(self, position):
+        return self.by_position.get(position, 0)
+
+    # ===== STORE LISTENER =====
+    def applications_added(self, records):
+        with self._lock:
+            for record in records:
+                self.by_status[record["Status"]] += 1
+                self.by_position[record["Position"]] += 1
+            self.total += len(records)
+        self._invalidate_shared()
+
+    def status_changed(self, record, old_status):
+        self.statuses_changed([record], [old_status])
+
+    def statuses_changed(self, records, old_statuses):
+        with self._lock:
+            for record, old_status in zip(records, old_statuses):
+                self.by_status[old_status] -= 1
+                if self.by_status[old_status] <= 0:
+                    del self.by_status[old_status]
+                self.by_status[record["Status"]] += 1
+        self._invalidate_shared()
+
+    def _invalidate_shared(self):
+        if self.shared_cache is not None:
+            self.shared_cache.invalidate("application-stats", within=INVALIDATE_WITHIN)
+
+    def _load_counts(self):
+        return self.store.counts_by("status"), self.store.counts_by("position")
+
+    def snapshot_state(self):
+        """Counts tagged with the store generation they match, for warm_snapshot."""
+        return self.store.counts_snapshot()
+
+    def bulk_loaded(self):
+        """Reload every counter after an import touched many rows at once."""
+        if self.shared_cache is None:
+            counts = self._load_counts()
+        else:
+            counts = self.shared_cache.get_or_build(
+                "application-stats", f"counts:{self.store.generation()}", self._load_counts,
+                ttl=SHARED_COUNTS_TTL,
+            )
+        self._set_counts(counts)
+
+    def _set_counts(self, counts):
+        by_status, by_position = Counter(counts[0]), Counter(counts[1])
+        with self._lock:
+            self.by_status = by_status
+            self.by_position = by_position
+            self.total = sum(by_status.values())
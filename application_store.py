@@ -0,0 +1,509 @@
+"""
+Kwazi's Fiber Bliss - Application Store
+SQLite-backed storage for job applications used by the recruitment portal
+"""
+
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from pathlib import Path
+
+from recruitment_analytics import RecruitmentRollups
+from status_transitions import STATUSES
+
+# ===== SCHEMA =====
+# Application ID is the primary key, so lookups by ID go through SQLite's
+# primary-key index instead of scanning every row. Status has its own index
+# so the tracker can count or list applications per status cheaply.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applications (
+    app_id             TEXT PRIMARY KEY,
+    applicant          TEXT NOT NULL,
+    position           TEXT NOT NULL,
+    status             TEXT NOT NULL,
+    applied_date       TEXT NOT NULL,
+    email              TEXT NOT NULL DEFAULT '',
+    phone              TEXT NOT NULL DEFAULT '',
+    location           TEXT NOT NULL DEFAULT '',
+    experience         TEXT NOT NULL DEFAULT '',
+    crochet_experience TEXT NOT NULL DEFAULT '',
+    availability       TEXT NOT NULL DEFAULT '',
+    why_join           TEXT NOT NULL DEFAULT '',
+    resume             TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_applications_status ON applications(status);
+CREATE INDEX IF NOT EXISTS idx_applications_applied ON applications(applied_date);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('generation', 0);
+"""
+
+# Columns of audit_log(); the history itself is recruitment_analytics' status_events
+AUDIT_COLUMNS = ["Batch", "Application ID", "From", "To", "Changed At", "By", "Reason"]
+
+# Database column -> key used in the application dicts the pages display
+FIELDS = {
+    "app_id": "Application ID",
+    "applicant": "Applicant",
+    "position": "Position",
+    "status": "Status",
+    "applied_date": "Applied Date",
+    "email": "Email",
+    "phone": "Phone",
+    "location": "Location",
+    "experience": "Experience",
+    "crochet_experience": "Crochet Experience",
+    "availability": "Availability",
+    "why_join": "Why Join",
+    "resume": "Resume",
+}
+COLUMNS = list(FIELDS.values())
+# Columns a new application can't be inserted without
+REQUIRED_FIELDS = ("app_id", "applicant", "position", "status", "applied_date")
+SELECT_ALL = f"SELECT {', '.join(FIELDS)} FROM applications"
+INSERT = (
+    f"INSERT INTO applications ({', '.join(FIELDS)}) "
+    f"VALUES ({', '.join('?' for _ in FIELDS)})"
+)
+
+# Stored in place of a resume key when the upload couldn't be saved, followed
+# by the reason; real keys are a SHA-256 and a file suffix, so never start with it
+RESUME_NOT_SAVED = "not saved: "
+
+# Application IDs look like KFB-APP1000; new numbers come from the
+# last_app_number counter in store_meta
+APP_ID_PREFIX = "KFB-APP"
+APP_ID_PATTERN = re.compile(rf"^{APP_ID_PREFIX}(\d+)$")
+
+
+def _to_record(row):
+    """Turn a database row into the dict shape the pages display."""
+    record = dict(zip(COLUMNS, row))
+    record["Applied Date"] = date.fromisoformat(record["Applied Date"])
+    return record
+
+
+def _to_db_value(key, value):
+    """Dates are stored as ISO strings, everything else as text."""
+    if key == "Applied Date":
+        if isinstance(value, datetime):
+            value = value.date()
+        if isinstance(value, date):
+            return value.isoformat()
+    return "" if value is None else str(value)
+
+
+def _to_row(record):
+    """Turn an application dict into a tuple ready for INSERT."""
+    return tuple(_to_db_value(key, record.get(key, "")) for key in COLUMNS)
+
+
+class ApplicationStore:
+    """Persistent table of applications with indexed ID and status lookups.
+
+    One connection is shared between Streamlit script threads, so every
+    statement runs under a lock.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._rollups = RecruitmentRollups()
+        self._rollups.create(self._conn)
+        self._data_version = self._read_data_version()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _migrate(self):
+        """Add columns and counters introduced after a database file was first created."""
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(applications)")}
+        with self._conn:
+            for column in FIELDS:
+                if column not in existing:
+                    self._conn.execute(
+                        f"ALTER TABLE applications ADD COLUMN {column} TEXT NOT NULL DEFAULT ''"
+                    )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO store_meta (key, value) "
+                "SELECT 'last_app_number', COALESCE(MAX(CAST(SUBSTR(app_id, ?) AS INTEGER)), 0) "
+                "FROM applications WHERE app_id LIKE ?",
+                (len(APP_ID_PREFIX) + 1, APP_ID_PREFIX + "%"),
+            )
+
+    def add_listener(self, listener):
+        """Register an object to be told about new applications and status changes.
+
+        Listeners may implement ``applications_added(records)``,
+        ``status_changed(record, old_status)``,
+        ``statuses_changed(records, old_statuses)`` (one call for a bulk
+        status update; listeners without it get ``status_changed`` per
+        record) and ``bulk_loaded()`` (called after an import, when
+        individual changes aren't reported). They are called after the
+        change has been committed.
+        """
+        self._listeners.append(listener)
+
+    def _read_data_version(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def changed_elsewhere(self):
+        """True if another connection (e.g. the import CLI) committed since the last check."""
+        with self._lock:
+            version = self._read_data_version()
+            changed = version != self._data_version
+            self._data_version = version
+        return changed
+
+    def finish_bulk_load(self):
+        """Tell listeners that an import has finished so they can reload."""
+        self._notify("bulk_loaded")
+
+    def _notify(self, event, *args):
+        for listener in self._listeners:
+            handler = getattr(listener, event, None)
+            if handler is not None:
+                handler(*args)
+
+    def _notify_statuses_changed(self, records, old_statuses):
+        for listener in self._listeners:
+            handler = getattr(listener, "statuses_changed", None)
+            if handler is not None:
+                handler(records, old_statuses)
+            elif hasattr(listener, "status_changed"):
+                for record, old_status in zip(records, old_statuses):
+                    listener.status_changed(record, old_status)
+
+    # ===== READS =====
+    def query(self, sql, params=()):
+        """Run a read-only query on the shared connection and return all rows."""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def get(self, app_id):
+        """Return one application by ID, or None if it doesn't exist."""
+        with self._lock:
+            row = self._conn.execute(
+                f"{SELECT_ALL} WHERE app_id = ?", (app_id,)
+            ).fetchone()
+        return _to_record(row) if row else None
+
+    def __contains__(self, app_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM applications WHERE app_id = ?", (app_id,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0]
+
+    def count_by_status(self, status):
+        """Count applications with a given status using the status index."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM applications WHERE status = ?", (status,)
+            ).fetchone()[0]
+
+    def ids_by_status(self, status):
+        """List application IDs with a given status using the status index."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT app_id FROM applications WHERE status = ? ORDER BY app_id",
+                (status,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def missing_resumes(self, limit=50):
+        """Applications whose uploaded resume couldn't be saved, as ``(record, reason)``, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"{SELECT_ALL} WHERE resume LIKE ? ORDER BY applied_date DESC, app_id DESC LIMIT ?",
+                (RESUME_NOT_SAVED + "%", limit),
+            ).fetchall()
+        records = [_to_record(row) for row in rows]
+        return [(record, record["Resume"][len(RESUME_NOT_SAVED):]) for record in records]
+
+    def generation(self):
+        """A number every write transaction increases, in this process or any other."""
+        with self._lock:
+            return self._read_generation()
+
+    def _read_generation(self):
+        return self._conn.execute("SELECT value FROM store_meta WHERE key = 'generation'").fetchone()[0]
+
+    def counts_snapshot(self):
+        """``(generation, {status: count}, {position: count})`` read together, so all three agree.
+
+        The counts are read in one transaction on a separate read connection,
+        like ``iter_chunks``, so the scans don't hold the store lock.
+        """
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, isolation_level=None)
+        try:
+            conn.execute("BEGIN")
+            return (
+                conn.execute("SELECT value FROM store_meta WHERE key = 'generation'").fetchone()[0],
+                dict(conn.execute("SELECT status, COUNT(*) FROM applications GROUP BY status")),
+                dict(conn.execute("SELECT position, COUNT(*) FROM applications GROUP BY position")),
+            )
+        finally:
+            conn.close()
+
+    def counts_by(self, column):
+        """Return {value: count} for "status" or "position" in one grouped query."""
+        if column not in ("status", "position"):
+            raise ValueError(f"Cannot group applications by {column!r}")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {column}, COUNT(*) FROM applications GROUP BY {column}"
+            ).fetchall()
+        return dict(rows)
+
+    def audit_log(self, limit=50, app_id=None):
+        """The most recent status changes as dicts keyed by ``AUDIT_COLUMNS``, newest first.
+
+        Every status change is listed, whether it came from the Admin page,
+        a bulk update or an import.
+        """
+        sql = "SELECT batch_id, app_id, old_status, new_status, changed_at, actor, reason FROM status_events"
+        params = []
+        if app_id is not None:
+            sql += " WHERE app_id = ?"
+            params.append(app_id)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(AUDIT_COLUMNS, row)) for row in rows]
+
+    def iter_chunks(self, statuses=None, positions=None, date_from=None, date_to=None, chunk_size=10_000):
+        """Yield matching applications as lists of at most ``chunk_size`` rows.
+
+        Rows are tuples in ``COLUMNS`` order with dates as ISO strings. A
+        separate read connection is used, so a long export doesn't hold the
+        store lock and WAL mode lets submissions continue meanwhile.
+        """
+        where, params = [], []
+        if statuses:
+            where.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if positions:
+            where.append(f"position IN ({', '.join('?' for _ in positions)})")
+            params.extend(positions)
+        if date_from:
+            where.append("applied_date >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            where.append("applied_date <= ?")
+            params.append(date_to.isoformat())
+        sql = SELECT_ALL
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY app_id"
+
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    # ===== WRITES =====
+    # Every write also updates the analytics rollups and bumps the generation
+    # in the same transaction
+    def _bump_generation(self):
+        self._conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'generation'")
+
+    def _advance_app_counter(self, app_ids):
+        """Move the ID counter past any numbered Application IDs written as given."""
+        numbers = [int(match[1]) for match in map(APP_ID_PATTERN.match, app_ids) if match]
+        if numbers:
+            self._conn.execute(
+                "UPDATE store_meta SET value = MAX(value, ?) WHERE key = 'last_app_number'", (max(numbers),)
+            )
+
+    def reserve_app_id(self):
+        """Claim the next Application ID in a write transaction of its own.
+
+        The counter lives in the database, so server processes sharing the
+        file never hand out the same ID, and imports move it past the IDs
+        they bring in.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'last_app_number'")
+            number = self._conn.execute(
+                "SELECT value FROM store_meta WHERE key = 'last_app_number'"
+            ).fetchone()[0]
+        return f"{APP_ID_PREFIX}{number}"
+
+    def _snapshot(self, app_ids):
+        """{app_id: (position, status, applied_date)} for the given IDs that exist."""
+        snapshot = {}
+        for start in range(0, len(app_ids), 500):
+            batch = app_ids[start:start + 500]
+            snapshot.update(
+                (row[0], row[1:])
+                for row in self._conn.execute(
+                    "SELECT app_id, position, status, applied_date FROM applications "
+                    f"WHERE app_id IN ({', '.join('?' for _ in batch)})",
+                    batch,
+                )
+            )
+        return snapshot
+
+    def add_many(self, records):
+        """Insert several applications in a single transaction."""
+        rows = [_to_row(record) for record in records]
+        with self._lock, self._conn:
+            self._conn.executemany(INSERT, rows)
+            self._advance_app_counter([row[0] for row in rows])
+            self._rollups.apply(
+                self._conn, [(row[0], None, (row[2], row[3], row[4])) for row in rows]
+            )
+            self._bump_generation()
+        self._notify("applications_added", records)
+
+    def add(self, record):
+        self.add_many([record])
+
+    def update_status(self, app_id, status, actor="", reason=""):
+        """Change the status of one application. Returns False if the ID is unknown."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"{SELECT_ALL} WHERE app_id = ?", (app_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            self._conn.execute(
+                "UPDATE applications SET status = ? WHERE app_id = ?",
+                (status, app_id),
+            )
+            before = (row[2], row[3], row[4])
+            self._rollups.apply(self._conn, [(app_id, before, (row[2], status, row[4]))], actor=actor, reason=reason)
+            if row[3] != status:
+                self._bump_generation()
+        record = _to_record(row)
+        old_status = record["Status"]
+        record["Status"] = status
+        if old_status != status:
+            self._notify("status_changed", record, old_status)
+        return True
+
+    def bulk_update_status(self, app_ids, status, from_statuses, actor="", reason=""):
+        """Move many applications to ``status`` in one transaction and return the changed records.
+
+        Only applications still in one of ``from_statuses`` are changed, so a
+        list planned from an older read can't overwrite a newer change. The
+        updates, their audit rows and the rollups commit together, and
+        listeners then get one ``statuses_changed`` call.
+        """
+        app_ids = list(dict.fromkeys(app_ids))
+        from_statuses = set(from_statuses) - {status}
+        with self._lock, self._conn:
+            before = self._snapshot(app_ids)
+            changing = [app_id for app_id in app_ids if app_id in before and before[app_id][1] in from_statuses]
+            if not changing:
+                return []
+            rows = []
+            for start in range(0, len(changing), 500):
+                batch = changing[start:start + 500]
+                placeholders = ", ".join("?" for _ in batch)
+                self._conn.execute(
+                    f"UPDATE applications SET status = ? WHERE app_id IN ({placeholders})",
+                    [status, *batch],
+                )
+                rows.extend(self._conn.execute(f"{SELECT_ALL} WHERE app_id IN ({placeholders})", batch))
+            self._rollups.apply(self._conn, [
+                (app_id, before[app_id], (before[app_id][0], status, before[app_id][2]))
+                for app_id in changing
+            ], actor=actor, reason=reason)
+            self._bump_generation()
+        records = [_to_record(row) for row in rows]
+        self._notify_statuses_changed(records, [before[record["Application ID"]][1] for record in records])
+        return records
+
+    def upsert_many(self, records, notify=True, actor="import", reason=""):
+        """Insert new applications and update existing ones by Application ID.
+
+        Only the fields present in each record are written for existing
+        applications, so a file with a subset of columns doesn't blank the
+        others; a record for a new application needs every field in
+        REQUIRED_FIELDS, or ValueError is raised. Status changes are written to the audit log under ``actor``
+        and ``reason``; they aren't held to ALLOWED_TRANSITIONS, since an
+        import brings in decisions already made elsewhere, but a status the
+        workflow doesn't know raises ValueError before anything is written.
+        Listeners get a single ``bulk_loaded`` call.
+        """
+        if not records:
+            return 0
+        unknown = sorted({str(record["Status"]) for record in records if "Status" in record} - set(STATUSES))
+        if unknown:
+            raise ValueError(f"Unknown application status {', '.join(map(repr, unknown))}")
+        groups = {}
+        for record in records:
+            columns = tuple(column for column, key in FIELDS.items() if key in record)
+            groups.setdefault(columns, []).append(
+                tuple(_to_db_value(key, record[key]) for key in (FIELDS[column] for column in columns))
+            )
+        app_ids = list(dict.fromkeys(str(record["Application ID"]) for record in records))
+        with self._lock, self._conn:
+            before = self._snapshot(app_ids)
+            stored = set(before)
+            # Full records first, so a partial one for an application they add can update it
+            complete = {columns: set(REQUIRED_FIELDS) <= set(columns) for columns in groups}
+            for columns, rows in sorted(groups.items(), key=lambda group: not complete[group[0]]):
+                updated = [column for column in columns if column != "app_id"]
+                if complete[columns]:
+                    self._conn.executemany(
+                        f"INSERT INTO applications ({', '.join(columns)}) "
+                        f"VALUES ({', '.join('?' for _ in columns)}) "
+                        f"ON CONFLICT(app_id) DO UPDATE SET "
+                        f"{', '.join(f'{column} = excluded.{column}' for column in updated)}",
+                        rows,
+                    )
+                    stored.update(row[0] for row in rows)
+                    continue
+                # Too few fields to insert with: these may only update applications already stored
+                missing = [row[0] for row in rows if row[0] not in stored]
+                if missing:
+                    raise ValueError(
+                        f"New applications need {', '.join(FIELDS[column] for column in REQUIRED_FIELDS)}; "
+                        f"missing for {', '.join(missing[:5])}"
+                    )
+                if updated:
+                    self._conn.executemany(
+                        f"UPDATE applications SET {', '.join(f'{column} = ?' for column in updated)} "
+                        "WHERE app_id = ?",
+                        [row[1:] + row[:1] for row in rows],
+                    )
+            self._advance_app_counter(app_ids)
+            after = self._snapshot(app_ids)
+            self._rollups.apply(self._conn, [
+                (app_id, before.get(app_id), after[app_id])
+                for app_id in app_ids if before.get(app_id) != after[app_id]
+            ], actor=actor, reason=reason)
+            self._bump_generation()
+        if notify:
+            self._notify("bulk_loaded")
+        return len(records)
+
+    def seed(self, records):
+        """Load sample applications the first time the store is created."""
+        if len(self) == 0:
+            self.add_many(records)
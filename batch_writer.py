@@ -0,0 +1,119 @@
+"""
+Kwazi's Fiber Bliss - Background Batch Writer
+Bounded queue drained by a worker thread that commits items in groups
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BatchWriter:
+    """Hand items to a background thread that writes them in batches.
+
+    ``write_batch(items)`` is called on the worker thread with up to
+    ``batch_size`` items at a time. A batch is written as soon as it is full
+    or ``flush_interval`` seconds after its first item arrived, whichever
+    comes first. The queue is bounded: ``put`` waits at most ``timeout``
+    seconds for space and then raises ``queue.Full`` so callers can push
+    back instead of piling up memory.
+
+    If a batch fails, its items are retried one at a time so one bad item
+    can't take the rest of the batch with it; items that still fail are
+    passed to ``dead_letter(item, error)`` (or only logged without one).
+    """
+
+    def __init__(self, write_batch, maxsize=1000, batch_size=100, flush_interval=0.5, name="batch-writer",
+                 dead_letter=None):
+        self._write_batch = write_batch
+        self._dead_letter = dead_letter
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ===== PRODUCER SIDE =====
+    def put(self, item, timeout=0.2):
+        """Queue one item. Raises queue.Full if the writer is backed up."""
+        if self._closed:
+            raise RuntimeError("BatchWriter is closed")
+        self._queue.put(item, timeout=timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """Block until everything queued so far has been written."""
+        self._queue.join()
+
+    def close(self):
+        """Write whatever is still queued and stop the worker thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    # ===== WORKER SIDE =====
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _write(self, batch):
+        try:
+            self._write_batch(batch)
+            return
+        except Exception as error:
+            if len(batch) == 1:
+                self._give_up(batch[0], error)
+                return
+            logger.warning("Failed to write a batch of %d items, retrying one at a time: %s", len(batch), error)
+        for item in batch:
+            try:
+                self._write_batch([item])
+            except Exception as error:
+                self._give_up(item, error)
+
+    def _give_up(self, item, error):
+        logger.error("Failed to write an item", exc_info=error)
+        if self._dead_letter is None:
+            return
+        try:
+            self._dead_letter(item, error)
+        except Exception:
+            logger.exception("Failed to record an item that couldn't be written")
@@ -0,0 +1,310 @@
+"""
+Kwazi's Fiber Bliss - Candidate Matching
+Scores every applicant against every job opening's requirements with
+hashed bag-of-words vectors and keeps a ranked shortlist per job
+"""
+
+import heapq
+import threading
+import zlib
+
+from application_store import COLUMNS
+from job_search import tokenize
+
+N_FEATURES = 2 ** 18              # hashed vocabulary size
+SHORTLIST_DEPTH = 50              # candidates kept per job; pages show the top of this
+BATCH_SIZE = 5_000                # applicants scored per batch
+PAIRS_PER_CHUNK = 2_000_000       # matching (applicant term, job term) pairs summed at a time
+DENSE_CELLS = 8_000_000           # jobs x job vocabulary below this are scored as dense matrix products
+APPLIED_BONUS = 0.10              # added when the applicant applied for this job
+AVAILABLE_SOON_BONUS = 0.05       # added for urgent jobs when the applicant can start soon
+# Applicants in these statuses are kept off the shortlists
+EXCLUDED_STATUSES = frozenset({"Rejected"})
+
+# The form's multiple-choice answers, phrased in the vocabulary job requirements use
+CROCHET_LEVEL_TERMS = {
+    "No experience": "willingness to learn",
+    "Beginner (self-taught)": "basic handcraft skills crochet willingness to learn",
+    "Intermediate": "crochet skills handcraft attention to detail",
+    "Advanced": "advanced crochet skills pattern creation quality",
+    "Professional": "advanced crochet skills pattern creation quality control team leadership",
+}
+EXPERIENCE_TERMS = {
+    "No experience": "",
+    "Less than 1 year": "experience",
+    "1-2 years": "experience",
+    "3-5 years": "3 years experience",
+    "5+ years": "3 years experience leadership",
+}
+AVAILABLE_SOON = {"Immediately", "Within 2 weeks"}
+
+
+def features(text):
+    """Hashed unigram and bigram feature ids for a piece of text."""
+    tokens = tokenize(text)
+    terms = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    return [zlib.crc32(term.encode("utf-8")) % N_FEATURES for term in terms]
+
+
+def job_text(job):
+    return " ".join([job["title"], job["description"], *job["requirements"]])
+
+
+def applicant_text(record):
+    """The free text plus the structured answers translated into requirement terms."""
+    return " ".join([
+        CROCHET_LEVEL_TERMS.get(record.get("Crochet Experience", ""), ""),
+        EXPERIENCE_TERMS.get(record.get("Experience", ""), ""),
+        record.get("Why Join", "") or "",
+    ])
+
+
+def _weighted_terms(texts, idf=None):
+    """The distinct hashed terms of each text with L2-normalised, log-scaled weights.
+
+    Returns parallel arrays ``(rows, terms, weights)``, sorted by row and
+    then term: a sparse matrix with one row per text, kept in plain numpy.
+    """
+    import numpy as np
+
+    rows, terms = [], []
+    for row, text in enumerate(texts):
+        ids = features(text)
+        rows.extend([row] * len(ids))
+        terms.extend(ids)
+    keys, counts = np.unique(
+        np.array(rows, dtype=np.int64) * N_FEATURES + np.array(terms, dtype=np.int64), return_counts=True
+    )
+    rows, terms = keys // N_FEATURES, keys % N_FEATURES
+    weights = 1.0 + np.log(counts)
+    if idf is not None:
+        weights *= idf[terms]
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(texts)))
+    norms[norms == 0] = 1.0
+    return rows, terms, weights / norms[rows]
+
+
+class JobVectors:
+    """TF-IDF vectors for one version of the job catalog.
+
+    Small catalogs keep a dense (job vocabulary x jobs) matrix, so a batch
+    of applicants is scored with one matrix product. Larger ones keep the
+    job vectors sorted by term instead: each applicant term is looked up
+    with a binary search and the products of the matching weights are
+    summed, a sparse dot product in plain numpy.
+    """
+
+    def __init__(self, catalog):
+        import numpy as np
+
+        self.fingerprint = catalog.fingerprint
+        self.titles = list(catalog.titles)
+        self.column = {title: i for i, title in enumerate(self.titles)}
+        self.urgent = np.array([catalog.is_urgent(i) for i in range(catalog.total)], dtype=np.float32)
+        texts = [job_text(job) for job in catalog.jobs]
+
+        # Terms found in every job say little about fit, so weight by inverse document frequency
+        document_frequency = np.zeros(N_FEATURES, dtype=np.float32)
+        for text in texts:
+            document_frequency[list(set(features(text)))] += 1
+        self.idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+        jobs, terms, weights = _weighted_terms(texts, self.idf)
+        self.vocabulary, term_rows = np.unique(terms, return_inverse=True)
+        if len(self.vocabulary) * len(texts) <= DENSE_CELLS:
+            self.dense = np.zeros((len(self.vocabulary), len(texts)), dtype=np.float32)
+            self.dense[term_rows, jobs] = weights
+        else:
+            self.dense = None
+            order = np.argsort(terms, kind="stable")
+            self.terms, self.term_jobs, self.term_weights = terms[order], jobs[order], weights[order]
+
+    def _similarity(self, texts):
+        """Dense (len(texts), jobs) cosine similarities."""
+        rows, terms, weights = _weighted_terms(texts, self.idf)
+        if self.dense is not None:
+            return self._dense_similarity(len(texts), rows, terms, weights)
+        return self._sparse_similarity(len(texts), rows, terms, weights)
+
+    def _dense_similarity(self, count, rows, terms, weights):
+        import numpy as np
+
+        # Applicant terms no job uses can't add to a score
+        index = np.searchsorted(self.vocabulary, terms)
+        known = index < len(self.vocabulary)
+        known[known] = self.vocabulary[index[known]] == terms[known]
+        rows, index, weights = rows[known], index[known], weights[known]
+        scores = np.empty((count, len(self.titles)), dtype=np.float32)
+        step = max(1, DENSE_CELLS // max(1, len(self.vocabulary)))
+        for start in range(0, count, step):
+            stop = min(count, start + step)
+            in_chunk = (rows >= start) & (rows < stop)
+            applicants = np.zeros((stop - start, len(self.vocabulary)), dtype=np.float32)
+            applicants[rows[in_chunk] - start, index[in_chunk]] = weights[in_chunk]
+            scores[start:stop] = applicants @ self.dense
+        return scores
+
+    def _sparse_similarity(self, count, rows, terms, weights):
+        import numpy as np
+
+        jobs = len(self.titles)
+        scores = np.zeros(count * jobs)
+        starts = np.searchsorted(self.terms, terms, "left")
+        counts = np.searchsorted(self.terms, terms, "right") - starts
+        ends = np.cumsum(counts)
+        begin = 0
+        while begin < len(terms):
+            # applicant terms begin:stop together match at most about PAIRS_PER_CHUNK job terms
+            stop = max(begin + 1, int(np.searchsorted(ends, ends[begin] - counts[begin] + PAIRS_PER_CHUNK, "right")))
+            chunk_counts = counts[begin:stop]
+            total = int(chunk_counts.sum())
+            if total:
+                pairs = np.repeat(np.arange(begin, stop), chunk_counts)
+                offsets = np.arange(total) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+                entries = starts[pairs] + offsets
+                cells = rows[pairs] * jobs + self.term_jobs[entries]
+                low = int(rows[begin]) * jobs
+                high = (int(rows[stop - 1]) + 1) * jobs
+                scores[low:high] += np.bincount(
+                    cells - low, weights=weights[pairs] * self.term_weights[entries], minlength=high - low
+                )
+            begin = stop
+        return scores.reshape(count, jobs).astype(np.float32)
+
+    def score(self, records):
+        """Dense (len(records), jobs) match scores for a batch of applications."""
+        import numpy as np
+
+        scores = self._similarity([applicant_text(record) for record in records])
+        applied = np.array([self.column.get(record.get("Position"), -1) for record in records])
+        has_position = applied >= 0
+        scores[np.flatnonzero(has_position), applied[has_position]] += APPLIED_BONUS
+        available = np.array([record.get("Availability") in AVAILABLE_SOON for record in records], dtype=np.float32)
+        scores += AVAILABLE_SOON_BONUS * np.outer(available, self.urgent)
+        return scores
+
+
+class CandidateMatcher:
+    """Ranked shortlist of applicants for every job opening.
+
+    Each job keeps a bounded min-heap of ``(score, app_id)``. New
+    applications are scored as one batch against all jobs and pushed into
+    the heaps, so work per submission doesn't grow with the number of
+    applicants already stored. Applicants in ``EXCLUDED_STATUSES`` are
+    left out before the heaps are cut to ``depth``, and a status change
+    evicts them. Once a heap that turned applicants away falls below half
+    its depth, the shortlists are marked stale so those applicants can
+    move up; a catalog change or an import does the same. Stale
+    shortlists are rebuilt from the store, in batches, the next time one
+    is read.
+    """
+
+    def __init__(self, store, current_catalog, depth=SHORTLIST_DEPTH, batch_size=BATCH_SIZE):
+        self.store = store
+        self.current_catalog = current_catalog
+        self.depth = depth
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._heaps = {}
+        self._cut = set()   # titles whose heap has turned applicants away
+        self._stale = True
+        store.add_listener(self)
+
+    # ===== SCORING =====
+    def _push(self, records, scores):
+        import numpy as np
+
+        ids = [record["Application ID"] for record in records]
+        keep = min(self.depth, len(ids))
+        if keep < len(ids):
+            self._cut.update(self._heaps)
+        for title, column in self._vectors.column.items():
+            heap = self._heaps[title]
+            column_scores = scores[:, column]
+            top = np.argpartition(-column_scores, keep - 1)[:keep]
+            for row in top:
+                entry = (float(column_scores[row]), ids[row])
+                if len(heap) < self.depth:
+                    heapq.heappush(heap, entry)
+                    continue
+                self._cut.add(title)
+                if entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+    def _score_and_push(self, records):
+        records = [record for record in records if record["Status"] not in EXCLUDED_STATUSES]
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            self._push(batch, self._vectors.score(batch))
+
+    def _rebuild(self, catalog):
+        self._vectors = JobVectors(catalog)
+        self._heaps = {title: [] for title in self._vectors.titles}
+        self._cut = set()
+        for rows in self.store.iter_chunks(chunk_size=self.batch_size):
+            self._score_and_push([dict(zip(COLUMNS, row)) for row in rows])
+        self._stale = False
+
+    def _ensure_current(self):
+        catalog = self.current_catalog()
+        if self._stale or self._vectors is None or self._vectors.fingerprint != catalog.fingerprint:
+            self._rebuild(catalog)
+
+    # ===== READS =====
+    def shortlist(self, title, limit=10):
+        """Best-matching applicants for a job as ``[(score, application record)]``, best first."""
+        with self._lock:
+            self._ensure_current()
+            ranked = sorted(self._heaps.get(title, ()), reverse=True)
+        shortlist = []
+        for score, app_id in ranked:
+            record = self.store.get(app_id)
+            if record is None or record["Status"] in EXCLUDED_STATUSES:
+                continue  # changed since it was ranked
+            shortlist.append((score, record))
+            if len(shortlist) == limit:
+                break
+        return shortlist
+
+    def best_jobs(self, record, limit=3):
+        """The openings an application matches best, as ``[(score, title)]``."""
+        with self._lock:
+            self._ensure_current()
+            scores = self._vectors.score([record])[0]
+            titles = self._vectors.titles
+        ranked = sorted(zip(scores.tolist(), titles), reverse=True)
+        return [(round(score, 3), title) for score, title in ranked[:limit] if score > 0]
+
+    # ===== STORE LISTENER =====
+    def applications_added(self, records):
+        with self._lock:
+            if self._stale or self._vectors is None:
+                return  # the next read rebuilds from the store anyway
+            self._score_and_push(list(records))
+
+    def bulk_loaded(self):
+        with self._lock:
+            self._stale = True
+
+    def status_changed(self, record, old_status):
+        self.statuses_changed([record], [old_status])
+
+    def statuses_changed(self, records, old_statuses):
+        excluded = {record["Application ID"] for record in records if record["Status"] in EXCLUDED_STATUSES}
+        reopened = [
+            record for record, old_status in zip(records, old_statuses)
+            if old_status in EXCLUDED_STATUSES and record["Status"] not in EXCLUDED_STATUSES
+        ]
+        with self._lock:
+            if self._stale or self._vectors is None:
+                return
+            for title, heap in self._heaps.items():
+                kept = [entry for entry in heap if entry[1] not in excluded]
+                if len(kept) == len(heap):
+                    continue
+                if title in self._cut and len(kept) < self.depth // 2:
+                    self._stale = True  # candidates below the cut were dropped; rebuild on the next read
+                    return
+                heapq.heapify(kept)
+                self._heaps[title] = kept
+            self._score_and_push(reopened)
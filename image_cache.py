@@ -0,0 +1,213 @@
+"""
+Kwazi's Fiber Bliss - Image Cache
+Fetches each header image once, keeps a resized copy on disk and serves the
+bytes from a size-capped in-memory LRU
+"""
+
+import hashlib
+import io
+import logging
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+FETCH_TIMEOUT = 5                 # seconds to wait for a remote image
+RETRY_AFTER = 300                 # seconds before retrying a failed fetch
+MAX_MEMORY_BYTES = 16 * 1024 * 1024
+
+
+def _is_remote(source):
+    return urlparse(str(source)).scheme in ("http", "https")
+
+
+def _resize(data, width):
+    """Shrink an image to ``width`` pixels wide; returns the input if Pillow can't."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width <= width:
+                return data
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.LANCZOS)
+            out = io.BytesIO()
+            if resized.mode in ("RGBA", "LA", "P"):
+                resized.save(out, format="PNG", optimize=True)
+            else:
+                resized.convert("RGB").save(out, format="JPEG", quality=85, optimize=True)
+            return out.getvalue()
+    except Exception:
+        logger.warning("Could not resize image; serving it at its original size", exc_info=True)
+        return data
+
+
+class ImageCache:
+    """Disk and memory cache for the images the apps display.
+
+    ``source`` is a URL or a local file path. Remote images are downloaded
+    on a background thread, at most once per process (failed downloads are
+    retried after ``RETRY_AFTER`` seconds, not on every rerun); ``get``
+    returns None until the bytes arrive, so no rerun waits on the remote
+    server. The resized bytes are kept in ``cache_dir`` so restarts don't
+    refetch them. With a ``shared_cache`` the resized bytes are also shared
+    with other server processes, and ``invalidate`` clears every process's
+    memory copy.
+    """
+
+    def __init__(self, cache_dir, max_memory_bytes=MAX_MEMORY_BYTES, fetch_timeout=FETCH_TIMEOUT,
+                 shared_cache=None):
+        self.cache_dir = Path(cache_dir)
+        self.shared_cache = shared_cache
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_memory_bytes = max_memory_bytes
+        self.fetch_timeout = fetch_timeout
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._failures = {}
+        self._fetching = set()
+        self._lock = threading.Lock()
+        if shared_cache is not None:
+            shared_cache.subscribe("images", self.clear_local)
+
+    def _disk_path(self, source, width):
+        name = str(source)
+        if not _is_remote(source):
+            try:
+                name += f"@{Path(source).stat().st_mtime_ns}"  # re-resize edited local files
+            except OSError:
+                pass
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}_{width or 'orig'}.img"
+
+    # ===== MEMORY LRU =====
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= len(self._memory.pop(key))
+            if len(data) > self.max_memory_bytes:
+                return
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _recall(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+            return data
+
+    # ===== LOADING =====
+    def _load_original(self, source):
+        if _is_remote(source):
+            request = urllib.request.Request(str(source), headers={"User-Agent": "KFB-image-cache"})
+            with urllib.request.urlopen(request, timeout=self.fetch_timeout) as response:
+                return response.read()
+        path = Path(urlparse(str(source)).path if str(source).startswith("file:") else source)
+        return path.read_bytes()
+
+    def get(self, source, width=None):
+        """Return image bytes for ``source`` resized to ``width``, or None if not available yet."""
+        disk_path = self._disk_path(source, width)
+        # The disk name carries a local file's mtime, so an edited file misses here too
+        key = disk_path.name
+        data = self._recall(key)
+        if data is not None:
+            return data
+
+        if disk_path.exists():
+            data = disk_path.read_bytes()
+            self._remember(key, data)
+            return data
+        if self.shared_cache is not None:
+            data = self.shared_cache.get("images", disk_path.name)
+            if data is not None:
+                self._remember(key, data)
+                return data
+        if not _is_remote(source):
+            return self._fetch(key, source, width, disk_path)
+        with self._lock:
+            if key in self._fetching or self._failed_recently(key):
+                return None
+            self._fetching.add(key)
+        threading.Thread(
+            target=self._fetch_in_background, args=(key, source, width, disk_path),
+            name="image-fetch", daemon=True,
+        ).start()
+        return None
+
+    def failed(self, source, width=None):
+        """True if the last attempt to load ``source`` failed (rather than still being underway)."""
+        with self._lock:
+            return self._failed_recently(self._disk_path(source, width).name)
+
+    def _failed_recently(self, key):
+        failed_at = self._failures.get(key)
+        return failed_at is not None and time.monotonic() - failed_at < RETRY_AFTER
+
+    def _fetch_in_background(self, key, source, width, disk_path):
+        try:
+            data = self._fetch(key, source, width, disk_path)
+            if data is not None and self.shared_cache is not None:
+                self.shared_cache.set("images", disk_path.name, data)
+        finally:
+            with self._lock:
+                self._fetching.discard(key)
+
+    def wait(self, timeout=None):
+        """Block until the background fetches under way have finished; for tests and warm-up scripts."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._fetching:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def _fetch(self, key, source, width, disk_path):
+        with self._lock:
+            if self._failed_recently(key):
+                return None
+        try:
+            original = self._load_original(source)
+        except (OSError, ValueError) as error:
+            logger.warning("Could not load image %s: %s", source, error)
+            with self._lock:
+                self._failures[key] = time.monotonic()
+            return None
+        with self._lock:
+            self._failures.pop(key, None)
+
+        data = _resize(original, width) if width else original
+        tmp_path = disk_path.with_suffix(f".{threading.get_ident()}.part")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(disk_path)
+        self._remember(key, data)
+        return data
+
+    def clear_local(self):
+        """Drop this process's memory and disk copies; sources are fetched again on next use."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for path in self.cache_dir.glob("*.img"):
+            path.unlink(missing_ok=True)
+
+    def invalidate(self):
+        """Forget every cached image here and, with a shared cache, in the other processes."""
+        self.clear_local()
+        if self.shared_cache is not None:
+            self.shared_cache.invalidate("images")
+
+    def memory_usage(self):
+        return self._memory_bytes, len(self._memory)
@@ -0,0 +1,214 @@
+"""
+Kwazi's Fiber Bliss - Inquiry Queue
+Rate-limited, de-duplicated inquiries appended to a JSONL log by a
+background writer
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from batch_writer import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+MAX_LOG_BYTES = 50 * 1024 * 1024           # start a new log file after this size
+ARCHIVE_ALERT_BYTES = 2 * 1024 * 1024 * 1024  # log an error once the gzipped logs pass this
+
+
+class RateLimited(Exception):
+    """Raised when a sender has used up their inquiry allowance for now."""
+
+
+# ===== RATE LIMITING =====
+class TokenBucketLimiter:
+    """Per-key token buckets: ``burst`` inquiries at once, refilling at ``rate`` per second.
+
+    Only the ``max_keys`` most recently seen keys are tracked, so a flood of
+    new IPs or addresses can't grow memory without bound; an evicted key
+    simply starts again with a full bucket.
+    """
+
+    def __init__(self, rate, burst, max_keys=10_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+
+class DedupWindow:
+    """Remembers recent inquiry fingerprints for ``seconds`` (at most ``max_entries``)."""
+
+    def __init__(self, seconds, max_entries=10_000):
+        self.seconds = seconds
+        self.max_entries = max_entries
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen_recently(self, fingerprint, now=None):
+        """Return True if this fingerprint was seen inside the window; records it otherwise."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self._seen:
+                _, seen_at = next(iter(self._seen.items()))
+                if now - seen_at < self.seconds and len(self._seen) < self.max_entries:
+                    break
+                self._seen.popitem(last=False)
+            if fingerprint in self._seen:
+                return True
+            self._seen[fingerprint] = now
+            return False
+
+
+def inquiry_fingerprint(inquiry):
+    """Same sender + same product + same message (ignoring case and spacing) = duplicate."""
+    parts = [
+        inquiry.get("email", "").strip().lower(),
+        inquiry.get("product_interest", ""),
+        " ".join(inquiry.get("message", "").lower().split()),
+    ]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+# ===== QUEUE =====
+class InquiryQueue:
+    """Front door for the inquiry form.
+
+    Each sender is limited per IP and per email address, repeats inside the
+    dedup window are dropped, and accepted inquiries are appended to
+    ``log_path`` by a background writer. If the writer's queue is full the
+    inquiry is written directly on the calling thread instead of being lost.
+    The log is rotated at ``max_log_bytes``; rotated files are gzipped and
+    never deleted, and an error is logged at each rotation once they take
+    more than ``archive_alert_bytes``, so someone can move them elsewhere.
+    """
+
+    def __init__(self, log_path, rate_per_minute=2, burst=5, dedup_seconds=600,
+                 maxsize=1000, batch_size=50, flush_interval=0.5,
+                 max_log_bytes=MAX_LOG_BYTES, archive_alert_bytes=ARCHIVE_ALERT_BYTES):
+        self.log_path = Path(log_path)
+        self.max_log_bytes = max_log_bytes
+        self.archive_alert_bytes = archive_alert_bytes
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ip_limiter = TokenBucketLimiter(rate_per_minute / 60, burst)
+        self.email_limiter = TokenBucketLimiter(rate_per_minute / 60, burst)
+        self.dedup = DedupWindow(dedup_seconds)
+        self._file_lock = threading.Lock()
+        self._writer = BatchWriter(
+            self._append,
+            maxsize=maxsize,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            name="inquiry-writer",
+        )
+
+    def submit(self, inquiry, ip=None):
+        """Queue an inquiry. Returns False for a duplicate; raises RateLimited."""
+        email = inquiry.get("email", "").strip().lower()
+        if ip and not self.ip_limiter.allow(ip):
+            raise RateLimited("Too many inquiries from your network. Please try again later.")
+        if email and not self.email_limiter.allow(email):
+            raise RateLimited("Too many inquiries from this email address. Please try again later.")
+        if self.dedup.seen_recently(inquiry_fingerprint(inquiry)):
+            return False
+        entry = dict(inquiry, received_at=datetime.now(timezone.utc).isoformat(), ip=ip or "")
+        try:
+            self._writer.put(entry, timeout=0.05)
+        except queue.Full:
+            self._append([entry])
+        return True
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        self._writer.close()
+
+    # ===== LOG FILE =====
+    def rotated_logs(self):
+        """Rotated log files, oldest first; gzipped, unless the server stopped before that finished."""
+        return sorted(
+            path for path in self.log_path.parent.glob(f"{self.log_path.stem}-*{self.log_path.suffix}*")
+            if path.name.endswith((self.log_path.suffix, f"{self.log_path.suffix}.gz"))
+        )
+
+    def archive_bytes(self):
+        return sum(path.stat().st_size for path in self.rotated_logs())
+
+    def read_entries(self):
+        """Every inquiry logged so far, rotated files first; for exports and tests."""
+        entries = []
+        for path in self.rotated_logs() + [self.log_path]:
+            opener = gzip.open if path.suffix == ".gz" else open
+            try:
+                with opener(path, "rt", encoding="utf-8") as log:
+                    entries.extend(json.loads(line) for line in log if line.strip())
+            except FileNotFoundError:
+                continue
+        return entries
+
+    @staticmethod
+    def _compress(path):
+        """Gzip a rotated log beside itself; the original is removed only once the copy is on disk."""
+        packed = path.with_name(path.name + ".gz")
+        partial = path.with_name(path.name + ".gz.tmp")
+        with open(path, "rb") as source, gzip.open(partial, "wb") as target:
+            shutil.copyfileobj(source, target)
+        with open(partial, "rb") as written:
+            os.fsync(written.fileno())
+        os.replace(partial, packed)
+        path.unlink()
+
+    def _rotate_if_needed(self):
+        try:
+            size = self.log_path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size < self.max_log_bytes:
+            return
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")
+        rotated = self.log_path.with_name(f"{self.log_path.stem}-{stamp}{self.log_path.suffix}")
+        self.log_path.rename(rotated)
+        try:
+            self._compress(rotated)
+        except OSError as error:
+            logger.warning("Couldn't gzip inquiry log %s, keeping it as is: %s", rotated.name, error)
+        archived = self.archive_bytes()
+        if archived > self.archive_alert_bytes:
+            logger.error(
+                "Rotated inquiry logs in %s take %.1f MB; move them to other storage. "
+                "None are deleted automatically.",
+                self.log_path.parent, archived / 1024 / 1024,
+            )
+
+    def _append(self, entries):
+        lines = "".join(json.dumps(entry, ensure_ascii=False, default=str) + "\n" for entry in entries)
+        with self._file_lock:
+            self._rotate_if_needed()
+            with open(self.log_path, "a", encoding="utf-8") as log:
+                log.write(lines)
+                log.flush()
+                os.fsync(log.fileno())
@@ -0,0 +1,88 @@
+"""
+Kwazi's Fiber Bliss - Job Cards
+Pre-rendered HTML for the job cards on the Job Openings page
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from html import escape
+
+from warm_snapshot import pack_texts, unpack_texts
+
+MAX_CACHED_CARDS = 4096
+
+_cards = OrderedDict()
+_cards_lock = threading.Lock()
+_cards_added = 0                  # fragments rendered so far; tells warm_snapshot when to save
+
+
+def job_version(job):
+    """Hash of a job's contents; a card is re-rendered only when this changes."""
+    payload = json.dumps(job, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _render(job, category):
+    urgent = '<span class="urgent-badge">URGENT</span>' if job.get("urgent", False) else ""
+    requirements = "".join(f"<li>{escape(req)}</li>" for req in job["requirements"])
+    return (
+        '<div class="job-card">'
+        f'<p><strong>{escape(job["title"])}</strong>{urgent} · <em>{escape(category)}</em></p>'
+        '<div class="job-details">'
+        f'<span>📍 <strong>Location:</strong> {escape(job["location"])}</span>'
+        f'<span>📄 <strong>Type:</strong> {escape(job["type"])}</span>'
+        f'<span>💰 <strong>Salary:</strong> {escape(job["salary"])}</span>'
+        '</div>'
+        f'<p><strong>Description:</strong> {escape(job["description"])}</p>'
+        f'<p><strong>Requirements:</strong></p><ul>{requirements}</ul>'
+        '</div>'
+    )
+
+
+def render_job_card(job, category, version):
+    """Return the whole card for one job as a single HTML fragment.
+
+    ``version`` is the job's ``job_version`` (precomputed by JobCatalog).
+    Fragments are cached per (version, category) in a bounded LRU shared
+    by all sessions, so a catalog reload only re-renders the jobs whose
+    contents actually changed.
+    """
+    global _cards_added
+    key = (version, category)
+    with _cards_lock:
+        html = _cards.get(key)
+        if html is not None:
+            _cards.move_to_end(key)
+            return html
+    html = _render(job, category)
+    with _cards_lock:
+        _cards[key] = html
+        _cards_added += 1
+        if len(_cards) > MAX_CACHED_CARDS:
+            _cards.popitem(last=False)
+    return html
+
+
+# ===== WARM START =====
+def export_cards():
+    """The cached fragments as ``(keys, packed html)``, oldest first, for a warm-start snapshot."""
+    with _cards_lock:
+        items = list(_cards.items())
+    return [key for key, _ in items], pack_texts([html for _, html in items])
+
+
+def cards_version():
+    """Changes whenever a fragment is added to the cache; ``export_cards`` is only worth calling then."""
+    return _cards_added
+
+
+def preload_cards(state):
+    """Fill the fragment cache from an ``export_cards`` result saved by an earlier process."""
+    keys, packed = state
+    with _cards_lock:
+        for key, html in zip(keys, unpack_texts(*packed)):
+            _cards.setdefault(key, html)
+        while len(_cards) > MAX_CACHED_CARDS:
+            _cards.popitem(last=False)
@@ -0,0 +1,224 @@
+"""
+Kwazi's Fiber Bliss - Job Catalog
+Flat, precomputed view of the job openings shared by every page, loaded
+from job_openings.json and reloaded when that file changes
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from job_cards import job_version
+from job_salaries import SalaryIndex, parse_salary
+from job_search import JobSearchIndex
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_JOB_FIELDS = {
+    "title": str,
+    "location": str,
+    "type": str,
+    "salary": str,
+    "description": str,
+    "requirements": list,
+}
+
+
+def catalog_fingerprint(openings):
+    """Stable hash of the openings dict, used to tell when the catalog changed."""
+    payload = json.dumps(openings, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class JobCatalog:
+    """Job openings flattened into parallel lists with O(1) counts and lookups.
+
+    Jobs are numbered in catalog order. ``titles[i]``, ``categories[i]``,
+    ``versions[i]``, ``salaries[i]`` (the parsed salary range) and
+    ``jobs[i]`` all describe job ``i``, and bit ``i`` of ``urgent_mask`` is
+    set when that job is urgent.
+    """
+
+    def __init__(self, openings, fingerprint=None):
+        self.fingerprint = fingerprint or catalog_fingerprint(openings)
+        self.category_names = list(openings)
+        self.jobs = []
+        self.titles = []
+        self.categories = []
+        self.versions = []
+        self.salaries = []
+        self.by_title = {}
+        self.by_category = {}
+        self.urgent_mask = 0
+
+        for category, jobs in openings.items():
+            indices = self.by_category.setdefault(category, [])
+            for job in jobs:
+                index = len(self.jobs)
+                self.jobs.append(job)
+                self.titles.append(job["title"])
+                self.categories.append(category)
+                self.versions.append(job_version(job))
+                self.salaries.append(parse_salary(job["salary"]))
+                self.by_title[job["title"]] = job
+                indices.append(index)
+                if job.get("urgent", False):
+                    self.urgent_mask |= 1 << index
+
+        self.total = len(self.jobs)
+        self.urgent_count = bin(self.urgent_mask).count("1")
+        self.salary_index = SalaryIndex(self)
+        self.search_index = JobSearchIndex(self)
+
+    def __len__(self):
+        return self.total
+
+    def is_urgent(self, index):
+        return bool(self.urgent_mask >> index & 1)
+
+    def jobs_in(self, category):
+        """Return the jobs of one category in catalog order."""
+        return [self.jobs[i] for i in self.by_category.get(category, [])]
+
+    def get(self, title):
+        return self.by_title.get(title)
+
+
+# ===== LOADING =====
+class CatalogError(ValueError):
+    """Raised when the job openings file is not a valid catalog."""
+
+
+def validate_openings(openings):
+    """Check the shape of a parsed openings file, raising CatalogError if it is wrong."""
+    if not isinstance(openings, dict) or not openings:
+        raise CatalogError("Job openings must be a non-empty object of category -> jobs")
+    seen_titles = set()
+    for category, jobs in openings.items():
+        if not isinstance(jobs, list):
+            raise CatalogError(f"Category {category!r} must hold a list of jobs")
+        for job in jobs:
+            if not isinstance(job, dict):
+                raise CatalogError(f"Every job in {category!r} must be an object")
+            for field, expected in REQUIRED_JOB_FIELDS.items():
+                if not isinstance(job.get(field), expected):
+                    raise CatalogError(
+                        f"Job {job.get('title', '?')!r} in {category!r} needs a {expected.__name__} {field!r}"
+                    )
+            if not all(isinstance(req, str) for req in job["requirements"]):
+                raise CatalogError(f"Requirements of {job['title']!r} must be strings")
+            if not isinstance(job.get("urgent", False), bool):
+                raise CatalogError(f"'urgent' of {job['title']!r} must be true or false")
+            if job["title"] in seen_titles:
+                raise CatalogError(f"Job title {job['title']!r} appears more than once")
+            seen_titles.add(job["title"])
+
+
+def parse_catalog(raw, source="job openings"):
+    """Parse, validate and flatten the bytes of a job openings JSON file."""
+    try:
+        openings = json.loads(raw)
+    except json.JSONDecodeError as error:
+        raise CatalogError(f"{source} is not valid JSON: {error}") from None
+    validate_openings(openings)
+    return JobCatalog(openings, hashlib.sha1(raw).hexdigest())
+
+
+def load_catalog(path):
+    """Parse, validate and flatten a job openings JSON file."""
+    return parse_catalog(Path(path).read_bytes(), path)
+
+
+class CatalogLoader:
+    """Keeps the current JobCatalog for a file and reloads it when the file changes.
+
+    One loader is shared by every session. ``current()`` stats the file at
+    most once every ``check_interval`` seconds; when the modification time
+    or size has changed it parses the file once and swaps the new catalog
+    in with a single reference assignment, so readers always see either
+    the old or the new catalog. An invalid edit is logged and the previous
+    catalog stays live.
+
+    With a ``shared_cache`` the built catalog is shared between server
+    processes by file hash, so only the first process to see a new file
+    builds it. A reload is broadcast on a namespace of its own, so the
+    other processes re-check the file straight away and find the new
+    catalog already built. ``warm`` is a catalog saved by an earlier
+    process (see warm_snapshot.py); it is used if the file hasn't changed
+    since.
+    """
+
+    def __init__(self, path, check_interval=2.0, shared_cache=None, warm=None):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.shared_cache = shared_cache
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._catalog = self._load(warm)
+        self._next_check = time.monotonic() + check_interval
+        if shared_cache is not None:
+            shared_cache.subscribe("job-catalog-reloads", self.check_now)
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, warm=None):
+        raw = self.path.read_bytes()
+        fingerprint = hashlib.sha1(raw).hexdigest()
+        if warm is not None and warm.fingerprint == fingerprint:
+            return warm
+        if self.shared_cache is None:
+            return parse_catalog(raw, self.path)
+        return self.shared_cache.get_or_build(
+            "job-catalog", fingerprint, lambda: parse_catalog(raw, self.path)
+        )
+
+    def snapshot_state(self):
+        """The current catalog, with its search and salary indexes, for warm_snapshot."""
+        return self._catalog
+
+    def check_now(self):
+        """Re-check the file on the next ``current()`` call instead of waiting."""
+        self._next_check = 0.0
+
+    def current(self):
+        """Return the latest valid catalog, reloading it if the file changed."""
+        if self.shared_cache is not None:
+            self.shared_cache.poll()
+        if time.monotonic() >= self._next_check:
+            self._maybe_reload()
+        return self._catalog
+
+    def _maybe_reload(self):
+        if not self._lock.acquire(blocking=False):
+            return  # another session is already checking
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                stamp = self._file_stamp()
+            except OSError as error:
+                self.last_error = str(error)
+                return
+            if stamp == self._stamp:
+                return
+            previous = self._catalog.fingerprint
+            try:
+                catalog = self._load()
+            except (OSError, CatalogError) as error:
+                self.last_error = str(error)
+                logger.warning("Keeping previous job catalog: %s", error)
+                return
+            self._stamp = stamp
+            self.last_error = None
+            self._catalog = catalog
+            logger.info("Reloaded job catalog from %s", self.path)
+            if self.shared_cache is not None and catalog.fingerprint != previous:
+                self.shared_cache.invalidate("job-catalog-reloads")
+        finally:
+            self._lock.release()
@@ -0,0 +1,130 @@
+"""
+Kwazi's Fiber Bliss - Job Salaries
+Free-text salaries parsed into monthly Rand ranges when the catalog loads,
+with a sorted index for "paying at least" filters and ordering by pay
+"""
+
+import bisect
+import re
+from dataclasses import dataclass
+
+# "8,000", "12 000", "8k", "8.5k" (the k is optional)
+_NUMBER = r"(\d{1,3}(?:[,\s]\d{3})+(?!\d)|\d+(?:\.\d+)?)(\s?[kK]\b)?"
+# "R8,000", "R 12 000", "R8k"
+AMOUNT_PATTERN = re.compile(rf"R\s?{_NUMBER}")
+# The second half of "R8,000 - 12,000" or "R8 to 12k", where the R is often left out
+RANGE_END_PATTERN = re.compile(rf"\s*(?:-|–|—|to)\s*R?\s?{_NUMBER}", re.IGNORECASE)
+# Salaries quoted per other periods are converted to per month
+PERIODS_PER_MONTH = [
+    (re.compile(r"per\s+hour|/\s*h(ou)?r\b|hourly", re.IGNORECASE), 173),
+    (re.compile(r"per\s+day|/\s*day\b|daily", re.IGNORECASE), 21.67),
+    (re.compile(r"per\s+week|/\s*w(ee)?k\b|weekly", re.IGNORECASE), 4.33),
+    (re.compile(r"per\s+(year|annum)|/\s*y(ea)?r\b|p\.?a\.?\b|annual", re.IGNORECASE), 1 / 12),
+]
+UP_TO_PATTERN = re.compile(r"\bup\s+to\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class SalaryRange:
+    """Monthly pay in Rand; both ends are None when the salary names no amount."""
+
+    text: str
+    minimum: int = None
+    maximum: int = None
+
+    @property
+    def numeric(self):
+        return self.maximum is not None
+
+    @property
+    def midpoint(self):
+        return (self.minimum + self.maximum) / 2 if self.numeric else None
+
+
+def _amount(digits, thousands):
+    value = float(re.sub(r"[,\s]", "", digits))
+    return value * 1000 if thousands else value
+
+
+def _amounts(text):
+    amounts = []
+    for match in AMOUNT_PATTERN.finditer(text):
+        amount = _amount(*match.groups())
+        end = RANGE_END_PATTERN.match(text, match.end())
+        if end is not None:
+            upper = _amount(*end.groups())
+            if end.group(2) and not match.group(2) and amount < 1000:
+                amount *= 1000        # "R8-12k" means R8k to R12k
+            amounts.append(upper)
+        amounts.append(amount)
+    return amounts
+
+
+def parse_salary(text):
+    """Parse "R8,000 - R12,000", "R8 000 - 12 000", "Up to R5k", "R150 per hour" and the like.
+
+    Stipends, commission and other salaries without an amount come back
+    with no minimum or maximum.
+    """
+    amounts = _amounts(text)
+    if not amounts:
+        return SalaryRange(text)
+    per_month = next((factor for pattern, factor in PERIODS_PER_MONTH if pattern.search(text)), 1)
+    minimum = 0 if UP_TO_PATTERN.search(text) else min(amounts) * per_month
+    return SalaryRange(text, round(minimum), round(max(amounts) * per_month))
+
+
+class SalaryIndex:
+    """Salary ranges of a JobCatalog, sorted once for range queries and ordering.
+
+    Results are int bitmasks over catalog positions, like the search index,
+    so a pay filter is one more AND. ``paying_at_least`` bisects the sorted
+    range minimums and returns a precomputed mask of every job at or above
+    that point. Sorting by pay uses ranks worked out here, with salaries
+    that name no amount always last.
+    """
+
+    def __init__(self, catalog):
+        salaries = catalog.salaries
+        numeric = sorted((salary.minimum, index) for index, salary in enumerate(salaries) if salary.numeric)
+        self.minimums = [minimum for minimum, _ in numeric]
+        # at_least_masks[k] has the bits of every job from position k of the sorted minimums up
+        self.at_least_masks = [0] * (len(numeric) + 1)
+        for k in range(len(numeric) - 1, -1, -1):
+            self.at_least_masks[k] = self.at_least_masks[k + 1] | 1 << numeric[k][1]
+        self.non_numeric_mask = 0
+        for index, salary in enumerate(salaries):
+            if not salary.numeric:
+                self.non_numeric_mask |= 1 << index
+
+        def ranks(highest_first):
+            sign = -1 if highest_first else 1
+            order = sorted(
+                range(len(salaries)),
+                key=lambda i: (not salaries[i].numeric, sign * (salaries[i].midpoint or 0), i),
+            )
+            rank = [0] * len(salaries)
+            for position, index in enumerate(order):
+                rank[index] = position
+            return rank
+
+        self._highest_first = ranks(True)
+        self._lowest_first = ranks(False)
+
+    @property
+    def highest(self):
+        """The highest starting pay of any range, or 0 if no salary names an amount."""
+        return self.minimums[-1] if self.minimums else 0
+
+    def paying_at_least(self, amount):
+        """Bitmask of jobs whose range starts at ``amount`` Rand per month or more.
+
+        The bottom of the range is what every hire can count on; a job
+        advertised at R8,000 - R20,000 doesn't pay at least R19,000.
+        """
+        return self.at_least_masks[bisect.bisect_left(self.minimums, amount)]
+
+    def sort_by_pay(self, positions, highest_first=True):
+        """``positions`` ordered by the middle of their salary range."""
+        rank = self._highest_first if highest_first else self._lowest_first
+        return sorted(positions, key=rank.__getitem__)
@@ -0,0 +1,128 @@
+"""
+Kwazi's Fiber Bliss - Job Search
+Inverted token index and facet filters over the job catalog
+"""
+
+import bisect
+import re
+
+from job_salaries import parse_salary
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Salary bands offered as a facet, checked in order against the top of the range
+SALARY_BANDS = [
+    ("Up to R5,000", 5_000),
+    ("R5,000 - R10,000", 10_000),
+    ("Above R10,000", None),
+]
+NON_SALARIED = "Stipend / commission"
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def salary_band(salary):
+    """Place a salary such as "R8,000 - R12,000" (text or a parsed SalaryRange) into one of the facet bands."""
+    if isinstance(salary, str):
+        salary = parse_salary(salary)
+    if not salary.numeric:
+        return NON_SALARIED
+    for label, limit in SALARY_BANDS:
+        if limit is None or salary.maximum <= limit:
+            return label
+
+
+def job_locations(job):
+    """Split "Remote / Dondotha, KZN" into its separate locations."""
+    return [part.strip() for part in job["location"].split("/") if part.strip()]
+
+
+class JobSearchIndex:
+    """Token and facet postings for a JobCatalog, built once when it loads.
+
+    Each posting is an int bitmask over catalog positions (bit ``i`` is job
+    ``i``), the same layout as ``JobCatalog.urgent_mask``, so combining
+    filters is a handful of integer ANDs and ORs.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.all_mask = (1 << catalog.total) - 1
+        self.tokens = {}
+        self.facets = {"category": {}, "location": {}, "type": {}, "salary": {}}
+
+        for index, job in enumerate(catalog.jobs):
+            bit = 1 << index
+            text = " ".join([job["title"], job["description"], *job["requirements"]])
+            for token in set(tokenize(text)):
+                self.tokens[token] = self.tokens.get(token, 0) | bit
+            self._add_facet("category", catalog.categories[index], bit)
+            for location in job_locations(job):
+                self._add_facet("location", location, bit)
+            self._add_facet("type", job["type"], bit)
+            self._add_facet("salary", salary_band(catalog.salaries[index]), bit)
+
+        self.vocabulary = sorted(self.tokens)
+
+    def _add_facet(self, facet, value, bit):
+        values = self.facets[facet]
+        values[value] = values.get(value, 0) | bit
+
+    def facet_values(self, facet):
+        """Facet values for the filter widgets, in a stable order."""
+        values = list(self.facets[facet])
+        if facet == "salary":
+            order = [label for label, _ in SALARY_BANDS] + [NON_SALARIED]
+            return [label for label in order if label in values]
+        if facet == "category":
+            return values
+        return sorted(values)
+
+    # ===== QUERIES =====
+    def _token_mask(self, token):
+        """Jobs containing any indexed word that starts with ``token``."""
+        mask = 0
+        position = bisect.bisect_left(self.vocabulary, token)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(token):
+            mask |= self.tokens[self.vocabulary[position]]
+            position += 1
+        return mask
+
+    def _facet_mask(self, facet, selected):
+        if not selected:
+            return self.all_mask
+        mask = 0
+        for value in selected:
+            mask |= self.facets[facet].get(value, 0)
+        return mask
+
+    def search(self, query="", categories=(), locations=(), types=(), salary_bands=(), urgent_only=False,
+               min_pay=0):
+        """Return catalog positions matching every filter, in catalog order.
+
+        Every word of ``query`` must match (as a prefix) somewhere in a job's
+        title, description or requirements. Within one facet any selected
+        value matches; different facets must all match. ``min_pay`` keeps
+        jobs whose salary range starts at that many Rand per month or more.
+        """
+        mask = self.all_mask
+        for token in tokenize(query):
+            mask &= self._token_mask(token)
+            if not mask:
+                return []
+        mask &= self._facet_mask("category", categories)
+        mask &= self._facet_mask("location", locations)
+        mask &= self._facet_mask("type", types)
+        mask &= self._facet_mask("salary", salary_bands)
+        if urgent_only:
+            mask &= self.catalog.urgent_mask
+        if min_pay:
+            mask &= self.catalog.salary_index.paying_at_least(min_pay)
+        matches = []
+        while mask:
+            lowest = mask & -mask
+            matches.append(lowest.bit_length() - 1)
+            mask ^= lowest
+        return matches
@@ -0,0 +1,86 @@
+"""
+Kwazi's Fiber Bliss - Lazy Imports
+Heavy libraries are imported the first time a page needs them instead of
+when the script starts, and each of those first imports is timed
+"""
+
+import importlib
+import subprocess
+import sys
+import threading
+import time
+from functools import lru_cache
+
+# Libraries worth keeping out of pages that don't use them
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "scipy", "PIL")
+
+_timings = {}
+_lock = threading.Lock()
+
+
+def lazy_import(name, reason=""):
+    """Import ``name`` on first use and remember how long that took.
+
+    ``reason`` (e.g. the page asking) is shown next to the timing in the
+    debug panel. Later calls are a dictionary lookup in ``sys.modules``.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        modules_before = len(sys.modules)
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        _timings[name] = {
+            "module": name,
+            "seconds": time.perf_counter() - started,
+            "modules_loaded": len(sys.modules) - modules_before,
+            "reason": reason,
+        }
+    return module
+
+
+def import_timings():
+    """First-import timings recorded by ``lazy_import`` in this process, slowest first."""
+    with _lock:
+        return sorted(_timings.values(), key=lambda timing: timing["seconds"], reverse=True)
+
+
+def loaded_heavy_modules():
+    """Which of ``HEAVY_MODULES`` this process has imported, by any route."""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+@lru_cache(maxsize=16)
+def importtime_report(name, top=15):
+    """Cold-import ``name`` in a fresh interpreter with ``-X importtime``.
+
+    Returns the ``top`` modules by cumulative time as dicts with
+    ``self_us``, ``cumulative_us`` and ``module``, or an empty list if the
+    import failed. Cached, since the answer only changes with the installed
+    packages.
+    """
+    try:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {name}"],
+            capture_output=True, text=True, timeout=60,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return []
+    if result.returncode != 0:
+        return []
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append({
+            "module": module.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    rows.sort(key=lambda row: row["cumulative_us"], reverse=True)
+    return rows[:top]
@@ -0,0 +1,323 @@
+"""
+Kwazi's Fiber Bliss - Load Test
+Replays scripted user journeys against both Streamlit apps with
+Streamlit's AppTest and reports rerun latency, memory per session and
+elements emitted
+
+Run it from the command line, e.g.:
+    python load_test.py --concurrency 4 --sessions 10
+    python load_test.py --compare benchmarks/baseline.json
+
+AppTest drives one script run at a time per process, so concurrency comes
+from worker processes. Each worker behaves like its own server process:
+its sessions share that worker's cached resources and a private data
+directory, and stay alive until the worker finishes so their memory is
+counted.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+APP_DIR = Path(__file__).parent
+APPS = {"profile": "app_profiler.py", "portal": "app_profiler_menus.py"}
+RESULTS_DIR = APP_DIR / "benchmarks"
+# A step counts as a regression when its p95 grows by more than this
+# fraction and by more than MIN_REGRESSION_MS
+REGRESSION_THRESHOLD = 0.20
+MIN_REGRESSION_MS = 5.0
+
+
+# ===== MEASURING =====
+def _rss_bytes():
+    """Resident memory of this process; peak RSS where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _count_elements(node):
+    children = getattr(node, "children", None)
+    if children is None:
+        return 1
+    return sum(_count_elements(child) for child in children.values())
+
+
+class Session:
+    """One simulated visitor: an AppTest instance plus the timings of its reruns."""
+
+    def __init__(self, app, script, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = app
+        self.at = AppTest.from_file(str(APP_DIR / script), default_timeout=timeout)
+        self.samples = []
+        self.errors = []
+
+    def step(self, journey, name, action=None):
+        """Apply ``action`` to the app (if any), rerun it and record how long that took."""
+        if action is not None:
+            action(self.at)
+        started = time.perf_counter()
+        self.at.run()
+        seconds = time.perf_counter() - started
+        elements = _count_elements(self.at.main) + _count_elements(self.at.sidebar)
+        self.samples.append((journey, name, seconds * 1000, elements))
+        for exception in self.at.exception:
+            self.errors.append(f"{journey}/{name}: {exception.value}")
+
+
+def _by_label(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+# ===== JOURNEYS =====
+def profile_browse(session, n):
+    session.step("browse", "load")
+    session.step("browse", "rerun")
+
+
+def profile_inquiry(session, n):
+    def fill(at):
+        _by_label(at.text_input, "Your Name").set_value(f"Load Test {n}")
+        _by_label(at.text_input, "Your Email").set_value(f"loadtest{n}@example.com")
+        _by_label(at.text_area, "Your Message").set_value(f"Benchmark inquiry number {n}")
+        _by_label(at.button, "Send").click()
+
+    session.step("inquiry", "submit", fill)
+
+
+def portal_browse(session, n):
+    session.step("browse", "load")
+    for page in session.at.sidebar.radio[0].options:
+        session.step("browse", page.split(" ", 1)[-1], lambda at, page=page: at.sidebar.radio[0].set_value(page))
+
+
+def portal_apply(session, n):
+    session.step("apply", "open", lambda at: at.sidebar.radio[0].set_value("📝 Apply Now"))
+
+    def fill(at):
+        _by_label(at.text_input, "Full Name *").set_value(f"Load Test {n}")
+        _by_label(at.text_input, "Email Address *").set_value(f"loadtest{n}@example.com")
+        _by_label(at.text_input, "Phone Number *").set_value("0660000000")
+        _by_label(at.text_input, "Current Location/Town *").set_value("Durban")
+        position = _by_label(at.selectbox, "Position Applying For *")
+        position.set_value(position.options[1 + n % (len(position.options) - 1)])
+        _by_label(at.text_area, "Why do you want to join Kwazi's Fiber Bliss? *").set_value("Benchmark")
+        _by_label(at.button, "Submit Application").click()
+
+    session.step("apply", "submit", fill)
+
+
+def portal_lookup(session, n):
+    session.step("lookup", "open", lambda at: at.sidebar.radio[0].set_value("📊 Applications"))
+    for app_id in (f"KFB-APP{1000 + n % 8}", "KFB-APP0"):
+        label = "found" if app_id != "KFB-APP0" else "not found"
+        session.step(
+            "lookup", label,
+            lambda at, app_id=app_id: at.text_input[0].set_value(app_id),
+        )
+
+
+JOURNEYS = {
+    "profile": [profile_browse, profile_inquiry],
+    "portal": [portal_browse, portal_apply, portal_lookup],
+}
+
+
+# ===== WORKERS =====
+def _run_worker(worker, apps, sessions, data_dir, timeout):
+    """Run ``sessions`` sessions of each app in this process and return raw samples."""
+    os.environ["KFB_DATA_DIR"] = str(Path(data_dir) / f"worker-{worker}")
+    os.chdir(APP_DIR)
+    sys.path.insert(0, str(APP_DIR))
+
+    results = {}
+    for app in apps:
+        live = []
+        samples = []
+        errors = []
+        # The first session pays for imports and cached resources; memory is measured after it
+        baseline = None
+        for i in range(sessions):
+            session = Session(app, APPS[app], timeout)
+            for journey in JOURNEYS[app]:
+                journey(session, worker * sessions + i)
+            live.append(session)
+            samples.extend(session.samples)
+            errors.extend(session.errors)
+            if baseline is None:
+                baseline = _rss_bytes()
+        grown = _rss_bytes() - baseline
+        results[app] = {
+            "samples": samples,
+            "errors": errors,
+            "bytes_per_session": grown / (sessions - 1) if sessions > 1 else None,
+        }
+    return results
+
+
+def _percentiles(values):
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {"p50": round(pick(0.50), 2), "p95": round(pick(0.95), 2), "p99": round(pick(0.99), 2)}
+
+
+def summarize(worker_results, apps):
+    summary = {}
+    for app in apps:
+        steps = {}
+        all_ms = []
+        errors = []
+        session_bytes = []
+        for result in worker_results:
+            app_result = result[app]
+            errors.extend(app_result["errors"])
+            if app_result["bytes_per_session"] is not None:
+                session_bytes.append(app_result["bytes_per_session"])
+            for journey, name, ms, elements in app_result["samples"]:
+                step = steps.setdefault(f"{journey}/{name}", {"ms": [], "elements": []})
+                step["ms"].append(ms)
+                step["elements"].append(elements)
+                all_ms.append(ms)
+        summary[app] = {
+            "reruns": len(all_ms),
+            "latency_ms": _percentiles(all_ms),
+            "kb_per_session": round(sum(session_bytes) / len(session_bytes) / 1024, 1) if session_bytes else None,
+            "errors": errors,
+            "steps": {
+                key: {
+                    "reruns": len(step["ms"]),
+                    **_percentiles(step["ms"]),
+                    "elements": round(sum(step["elements"]) / len(step["elements"]), 1),
+                }
+                for key, step in sorted(steps.items())
+            },
+        }
+    return summary
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load_test(apps=tuple(APPS), concurrency=2, sessions=5, timeout=30, data_dir=None):
+    """Run every journey of ``apps`` in ``concurrency`` workers of ``sessions`` sessions each."""
+    import streamlit
+
+    with tempfile.TemporaryDirectory(prefix="kfb-load-") as scratch:
+        data_dir = data_dir or scratch
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(_run_worker, worker, apps, sessions, data_dir, timeout)
+                for worker in range(concurrency)
+            ]
+            worker_results = [future.result() for future in futures]
+        wall_seconds = time.perf_counter() - started
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "platform": platform.platform(),
+            "concurrency": concurrency,
+            "sessions_per_worker": sessions,
+            "wall_seconds": round(wall_seconds, 2),
+        },
+        "apps": summarize(worker_results, apps),
+    }
+
+
+# ===== COMPARING RUNS =====
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD, min_ms=MIN_REGRESSION_MS):
+    """List steps whose p95 latency or element count got worse than ``baseline``."""
+    regressions = []
+    for app, summary in current["apps"].items():
+        old_steps = baseline.get("apps", {}).get(app, {}).get("steps", {})
+        for key, step in summary["steps"].items():
+            old = old_steps.get(key)
+            if old is None:
+                continue
+            grown = step["p95"] - old["p95"]
+            if grown > min_ms and step["p95"] > old["p95"] * (1 + threshold):
+                regressions.append(f"{app} {key}: p95 {old['p95']} ms -> {step['p95']} ms")
+            if step["elements"] > old["elements"]:
+                regressions.append(f"{app} {key}: {old['elements']} -> {step['elements']} elements")
+    return regressions
+
+
+def print_report(results):
+    meta = results["meta"]
+    print(f"{meta['concurrency']} workers x {meta['sessions_per_worker']} sessions, {meta['wall_seconds']} s wall")
+    for app, summary in results["apps"].items():
+        latency = summary["latency_ms"]
+        print(
+            f"\n{app}: {summary['reruns']} reruns, p50 {latency['p50']} / p95 {latency['p95']} / "
+            f"p99 {latency['p99']} ms, {summary['kb_per_session']} KB per session"
+        )
+        print(f"  {'step':<32} {'p50':>8} {'p95':>8} {'p99':>8} {'elements':>9}")
+        for key, step in summary["steps"].items():
+            print(f"  {key:<32} {step['p50']:>8} {step['p95']:>8} {step['p99']:>8} {step['elements']:>9}")
+        for error in summary["errors"][:10]:
+            print(f"  ERROR {error}")
+
+
+# ===== COMMAND LINE =====
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the KFB Streamlit apps.")
+    parser.add_argument("--app", choices=sorted(APPS), action="append", help="repeat for several; default both")
+    parser.add_argument("--concurrency", type=int, default=2, help="worker processes running at once")
+    parser.add_argument("--sessions", type=int, default=5, help="sessions per worker")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds allowed per rerun")
+    parser.add_argument("--output", help="results file (default benchmarks/results-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file; exit 1 if this run regressed")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run_load_test(tuple(args.app or APPS), args.concurrency, args.sessions, args.timeout)
+    print_report(results)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"results-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nSaved results to {output}")
+
+    failed = any(summary["errors"] for summary in results["apps"].values())
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(baseline, results, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if not regressions:
+            print(f"No regressions against {args.compare}")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Kwazi's Fiber Bliss - Page Registry
+Sidebar pages that declare the data they need, so each rerun only builds
+what the page being shown uses
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Page:
+    label: str
+    render: object
+    needs: tuple = ()
+
+
+class PageRegistry:
+    """Sidebar pages and the named dependencies they render from.
+
+    A dependency is a function that builds one value. It runs the first
+    time a page that needs it is shown in a session, and the value is kept
+    in ``session_state`` for that session's later reruns. A dependency
+    registered with a ``version`` function is rebuilt whenever that function
+    returns something new, e.g. when the job catalog file is reloaded.
+    """
+
+    def __init__(self, session_state, state_key="page_dependencies"):
+        self.session_state = session_state
+        self.state_key = state_key
+        self._pages = {}
+        self._dependencies = {}
+
+    @property
+    def labels(self):
+        return list(self._pages)
+
+    def dependency(self, name, version=None):
+        """Decorator registering ``func`` as the provider of ``name``."""
+        def register(func):
+            self._dependencies[name] = (func, version)
+            return func
+        return register
+
+    def page(self, label, needs=()):
+        """Decorator registering ``func`` as a page; it is called with its ``needs`` as keyword arguments."""
+        def register(func):
+            self._pages[label] = Page(label, func, tuple(needs))
+            return func
+        return register
+
+    def resolve(self, name):
+        """Return a dependency's value, building it only if this session doesn't have a current one."""
+        provider, version = self._dependencies[name]
+        token = version() if version is not None else None
+        resolved = self.session_state.get(self.state_key)
+        if resolved is None:
+            resolved = self.session_state[self.state_key] = {}
+        cached = resolved.get(name)
+        if cached is None or cached[0] != token:
+            cached = resolved[name] = (token, provider())
+        return cached[1]
+
+    def render(self, label):
+        page = self._pages[label]
+        page.render(**{name: self.resolve(name) for name in page.needs})
+
+    def navigate(self, label, widget_key="menu", **state):
+        """``on_click`` callback: switch the sidebar to ``label`` and set any extra session values."""
+        if label not in self._pages:
+            raise KeyError(f"Unknown page {label!r}")
+        self.session_state[widget_key] = label
+        for key, value in state.items():
+            self.session_state[key] = value
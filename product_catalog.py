@@ -0,0 +1,158 @@
+"""
+Kwazi's Fiber Bliss - Product Catalog
+Products, prices and discount codes, with a vectorized quote engine for
+baskets and bulk orders
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class Product:
+    sku: str
+    category: str
+    name: str
+    price_cents: int
+
+
+@dataclass(frozen=True)
+class DiscountCode:
+    code: str
+    description: str
+    amount_off_cents: int
+    under_7_only: bool = False
+
+
+# ===== CATALOG =====
+PRODUCTS = [
+    Product("HAT-RUF", "HATS", "Ruffle Hats", 25000),
+    Product("HAT-BEA", "HATS", "Beanie Hats", 15000),
+    Product("HAT-SUN", "HATS", "Sun Hats", 17000),
+    Product("BIK-SET", "BIKINIS", "Bikini Sets", 30000),
+    Product("BIK-MIX", "BIKINIS", "Mix & Match", 28000),
+    Product("TPS-YTH", "TWO-PIECE SETS", "Youth Sets", 32000),
+    Product("TPS-SEA", "TWO-PIECE SETS", "Seasoned Sets", 35000),
+    Product("BAG-CLS", "HANDBAGS", "Crochet Classy Bags", 35000),
+]
+
+DISCOUNT_CODES = {
+    "KIDSBUZZ7": DiscountCode(
+        "KIDSBUZZ7", "R50 OFF for children under 7 years", 5000, under_7_only=True
+    ),
+}
+
+PRODUCTS_BY_SKU = {product.sku: product for product in PRODUCTS}
+# SKU -> row in the price vector used by the quote engine
+SKU_INDEX = {product.sku: i for i, product in enumerate(PRODUCTS)}
+
+
+def format_rands(cents):
+    """Format a price in cents the way the shop shows it, e.g. 25000 -> "R250"."""
+    rands, rem = divmod(int(cents), 100)
+    return f"R{rands:,}" if rem == 0 else f"R{rands:,}.{rem:02d}"
+
+
+def products_by_category():
+    """{category: [Product, ...]} in catalog order."""
+    grouped = {}
+    for product in PRODUCTS:
+        grouped.setdefault(product.category, []).append(product)
+    return grouped
+
+
+@lru_cache(maxsize=1)
+def price_list_lines():
+    """The Products & Prices section as display lines, built once per process."""
+    lines = []
+    for category, products in products_by_category().items():
+        if lines:
+            lines.append("")
+        lines.append(f"**{category}**")
+        lines.extend(f"{product.name}: {format_rands(product.price_cents)}" for product in products)
+    for discount in DISCOUNT_CODES.values():
+        lines.append("")
+        lines.append(f"**Children's Discount:** {discount.description}")
+        lines.append(f"Use code: {discount.code}")
+    return tuple(lines)
+
+
+# ===== QUOTE ENGINE =====
+@lru_cache(maxsize=1)
+def _price_vector():
+    import numpy as np
+
+    return np.array([product.price_cents for product in PRODUCTS], dtype=np.int64)
+
+
+def _normalize_basket(basket):
+    """Turn basket lines into a hashable, order-independent tuple.
+
+    A line is ``(sku, quantity)`` or ``(sku, quantity, under_7_quantity)``
+    where ``under_7_quantity`` is how many of those items are for children
+    under 7. Repeated SKUs are merged.
+    """
+    merged = {}
+    for line in basket:
+        sku, quantity, *rest = line
+        if sku not in SKU_INDEX:
+            raise KeyError(f"Unknown product SKU {sku!r}")
+        under_7 = rest[0] if rest else 0
+        if quantity < 0 or under_7 < 0 or under_7 > quantity:
+            raise ValueError(f"Invalid quantities for {sku}: {quantity} items, {under_7} under 7")
+        total, kids = merged.get(sku, (0, 0))
+        merged[sku] = (total + int(quantity), kids + int(under_7))
+    return tuple(sorted((sku, total, kids) for sku, (total, kids) in merged.items()))
+
+
+@lru_cache(maxsize=1024)
+def _quote(lines, code):
+    import numpy as np
+
+    discount = DISCOUNT_CODES.get(code) if code else None
+    if code and discount is None:
+        raise KeyError(f"Unknown discount code {code!r}")
+
+    rows = np.fromiter((SKU_INDEX[sku] for sku, _, _ in lines), dtype=np.int64, count=len(lines))
+    quantities = np.fromiter((total for _, total, _ in lines), dtype=np.int64, count=len(lines))
+    under_7 = np.fromiter((kids for _, _, kids in lines), dtype=np.int64, count=len(lines))
+
+    unit_prices = _price_vector()[rows]
+    subtotals = unit_prices * quantities
+    discounts = np.zeros_like(subtotals)
+    if discount is not None:
+        eligible = under_7 if discount.under_7_only else quantities
+        # Never discount an item below zero
+        discounts = np.minimum(unit_prices, discount.amount_off_cents) * eligible
+    line_totals = subtotals - discounts
+
+    return {
+        "lines": [
+            {
+                "sku": sku,
+                "product": PRODUCTS_BY_SKU[sku].name,
+                "quantity": int(quantities[i]),
+                "under_7": int(under_7[i]),
+                "unit_price_cents": int(unit_prices[i]),
+                "discount_cents": int(discounts[i]),
+                "total_cents": int(line_totals[i]),
+            }
+            for i, (sku, _, _) in enumerate(lines)
+        ],
+        "subtotal_cents": int(subtotals.sum()),
+        "discount_cents": int(discounts.sum()),
+        "total_cents": int(line_totals.sum()),
+        "code": code or None,
+    }
+
+
+def quote(basket, code=None):
+    """Price a whole basket or bulk order in one vectorized pass.
+
+    ``basket`` is an iterable of ``(sku, quantity[, under_7_quantity])``
+    lines; ``code`` is an optional discount code such as "KIDSBUZZ7".
+    Results are cached per (basket, code), so re-quoting the same order is
+    a dictionary lookup.
+    """
+    code = code.strip().upper() if code else None
+    return _quote(_normalize_basket(basket), code)
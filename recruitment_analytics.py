@@ -0,0 +1,387 @@
+"""
+Kwazi's Fiber Bliss - Recruitment Analytics
+Rollup tables kept current inside the application store's write
+transactions, and the queries the analytics page reads from them
+"""
+
+import uuid
+from collections import Counter
+from datetime import date, datetime
+
+# The hiring path in order; reaching a stage means the earlier ones were passed
+FUNNEL_STAGES = ["New", "Under Review", "Interview Scheduled", "Offer"]
+REJECTED = "Rejected"
+STAGE_RANK = {stage: rank for rank, stage in enumerate(FUNNEL_STAGES)}
+# Lower bounds, in days, of the time-in-stage histogram buckets
+STAGE_TIME_BUCKETS = [0, 1, 2, 3, 7, 14, 30, 60, 90]
+# Bump when the rollup tables change shape; they are rebuilt on next start
+ROLLUP_VERSION = "1"
+
+# ===== SCHEMA =====
+# status_events is the raw history and the audit log, one row per status
+# change with who made it and why; the triggers make it append-only. The
+# rollup_* tables are small pre-aggregated counts the charts read directly,
+# and app_progress remembers how far each application got so a change can
+# be rolled up without looking at its history.
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS status_events (
+    id            INTEGER PRIMARY KEY,
+    app_id        TEXT NOT NULL,
+    old_status    TEXT NOT NULL,
+    new_status    TEXT NOT NULL,
+    changed_at    TEXT NOT NULL,
+    days_in_stage REAL NOT NULL,
+    batch_id      TEXT NOT NULL DEFAULT '',
+    actor         TEXT NOT NULL DEFAULT '',
+    reason        TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_status_events_app ON status_events(app_id, id);
+CREATE TRIGGER IF NOT EXISTS status_events_no_update BEFORE UPDATE ON status_events
+BEGIN SELECT RAISE(ABORT, 'status_events is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS status_events_no_delete BEFORE DELETE ON status_events
+BEGIN SELECT RAISE(ABORT, 'status_events is append-only'); END;
+CREATE TABLE IF NOT EXISTS app_progress (
+    app_id      TEXT PRIMARY KEY,
+    position    TEXT NOT NULL,
+    furthest    INTEGER NOT NULL,
+    rejected    INTEGER NOT NULL,
+    stage_since TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_daily (
+    day          TEXT NOT NULL,
+    position     TEXT NOT NULL,
+    applications INTEGER NOT NULL,
+    PRIMARY KEY (day, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_funnel (
+    position     TEXT NOT NULL,
+    stage        TEXT NOT NULL,
+    applications INTEGER NOT NULL,
+    PRIMARY KEY (position, stage)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_stage_time (
+    stage       TEXT NOT NULL,
+    bucket      INTEGER NOT NULL,
+    transitions INTEGER NOT NULL,
+    total_days  REAL NOT NULL,
+    PRIMARY KEY (stage, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def stage_time_bucket(days):
+    """The histogram bucket (its lower bound in days) for a time in stage."""
+    bucket = STAGE_TIME_BUCKETS[0]
+    for lower in STAGE_TIME_BUCKETS:
+        if days < lower:
+            break
+        bucket = lower
+    return bucket
+
+
+def bucket_label(bucket):
+    i = STAGE_TIME_BUCKETS.index(bucket)
+    if i + 1 == len(STAGE_TIME_BUCKETS):
+        return f"{bucket}+ days"
+    return f"{bucket}-{STAGE_TIME_BUCKETS[i + 1]} days"
+
+
+def _rank_sql(column):
+    cases = " ".join(f"WHEN '{stage}' THEN {rank}" for stage, rank in STAGE_RANK.items())
+    return f"CASE {column} {cases} ELSE 0 END"
+
+
+def _bucket_sql(column):
+    cases = " ".join(
+        f"WHEN {column} >= {lower} THEN {lower}" for lower in reversed(STAGE_TIME_BUCKETS[1:])
+    )
+    return f"CASE {cases} ELSE {STAGE_TIME_BUCKETS[0]} END"
+
+
+def _started(value):
+    """stage_since is an applied date ("2024-01-01") or a change time."""
+    return datetime.fromisoformat(value)
+
+
+# ===== MAINTENANCE =====
+class RecruitmentRollups:
+    """Keeps the rollup tables in step with the applications table.
+
+    The store calls ``apply`` inside the same transaction as each write, so
+    rollups can never disagree with the rows they summarize. Each change is
+    ``(app_id, before, after)`` where ``before`` and ``after`` are
+    ``(position, status, applied_date)`` tuples and ``before`` is None for a
+    new application.
+    """
+
+    def create(self, conn):
+        """Create the tables, rebuilding them from the applications if they are new or outdated."""
+        self._migrate(conn)
+        conn.executescript(ROLLUP_SCHEMA)
+        row = conn.execute("SELECT value FROM rollup_meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != ROLLUP_VERSION:
+            with conn:
+                self.rebuild(conn)
+
+    @staticmethod
+    def _migrate(conn):
+        """Add the audit columns to a status_events table created before them.
+
+        Databases from before the merge kept who changed a status, and why,
+        in a separate status_audit table; its rows are copied onto the
+        matching events and the table is dropped.
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(status_events)")}
+        if not columns:
+            return
+        with conn:
+            for column in ("batch_id", "actor", "reason"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE status_events ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'status_audit'").fetchone():
+                match = (
+                    "FROM status_audit a WHERE a.app_id = status_events.app_id "
+                    "AND a.old_status = status_events.old_status AND a.new_status = status_events.new_status "
+                    "AND a.changed_at = status_events.changed_at"
+                )
+                conn.execute(
+                    f"UPDATE status_events SET (batch_id, actor, reason) = "
+                    f"(SELECT a.batch_id, a.actor, a.reason {match} ORDER BY a.id LIMIT 1) "
+                    f"WHERE EXISTS (SELECT 1 {match})"
+                )
+                conn.execute("DROP TABLE status_audit")
+
+    def rebuild(self, conn):
+        """Recompute every rollup from the applications table and the status history."""
+        conn.execute("DELETE FROM rollup_daily")
+        conn.execute("DELETE FROM rollup_funnel")
+        conn.execute("DELETE FROM rollup_stage_time")
+        conn.execute("DELETE FROM app_progress")
+        conn.execute(
+            "INSERT INTO rollup_daily (day, position, applications) "
+            "SELECT applied_date, position, COUNT(*) FROM applications GROUP BY applied_date, position"
+        )
+        # Progress comes from the status history where there is one; otherwise an
+        # application is taken to have passed every stage before its current one
+        conn.execute(
+            "INSERT INTO app_progress (app_id, position, furthest, rejected, stage_since) "
+            f"SELECT a.app_id, a.position, MAX({_rank_sql('a.status')}, COALESCE(("
+            f"    SELECT MAX(MAX({_rank_sql('e.old_status')}, {_rank_sql('e.new_status')})) "
+            "    FROM status_events e WHERE e.app_id = a.app_id), 0)), "
+            "a.status = ? OR EXISTS ("
+            "    SELECT 1 FROM status_events e WHERE e.app_id = a.app_id AND e.new_status = ?), "
+            "COALESCE(("
+            "    SELECT changed_at FROM status_events e WHERE e.app_id = a.app_id ORDER BY id DESC LIMIT 1"
+            "), a.applied_date) "
+            "FROM applications a",
+            (REJECTED, REJECTED),
+        )
+        for stage, rank in STAGE_RANK.items():
+            conn.execute(
+                "INSERT INTO rollup_funnel (position, stage, applications) "
+                "SELECT position, ?, COUNT(*) FROM app_progress WHERE furthest >= ? GROUP BY position",
+                (stage, rank),
+            )
+        conn.execute(
+            "INSERT INTO rollup_funnel (position, stage, applications) "
+            "SELECT position, ?, COUNT(*) FROM app_progress WHERE rejected GROUP BY position",
+            (REJECTED,),
+        )
+        conn.execute(
+            "INSERT INTO rollup_stage_time (stage, bucket, transitions, total_days) "
+            f"SELECT old_status, {_bucket_sql('days_in_stage')}, COUNT(*), SUM(days_in_stage) "
+            "FROM status_events GROUP BY 1, 2"
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO rollup_meta (key, value) VALUES ('version', ?)", (ROLLUP_VERSION,)
+        )
+
+    @staticmethod
+    def _progress(conn, app_ids):
+        """{app_id: (position, furthest, rejected, stage_since)}, read 500 IDs per query."""
+        progress = {}
+        for start in range(0, len(app_ids), 500):
+            batch = app_ids[start:start + 500]
+            progress.update(
+                (row[0], row[1:])
+                for row in conn.execute(
+                    "SELECT app_id, position, furthest, rejected, stage_since FROM app_progress "
+                    f"WHERE app_id IN ({', '.join('?' for _ in batch)})",
+                    batch,
+                )
+            )
+        return progress
+
+    def apply(self, conn, changes, at=None, actor="", reason=""):
+        """Fold a batch of application changes into the rollups.
+
+        Status changes are logged to status_events as one batch, with
+        ``actor`` and ``reason``. Returns the batch ID.
+        """
+        at = at or datetime.now()
+        changed_at = at.isoformat(timespec="seconds")
+        batch_id = uuid.uuid4().hex[:12]
+        daily = Counter()
+        funnel = Counter()
+        stage_time = Counter()
+        stage_days = Counter()
+        events = []
+        progress_rows = []
+        progress_by_id = self._progress(conn, [app_id for app_id, before, _ in changes if before is not None])
+
+        for app_id, before, after in changes:
+            position, status, applied = after
+            if before is None or (before[0], before[2]) != (position, applied):
+                if before is not None:
+                    daily[(before[2], before[0])] -= 1
+                daily[(applied, position)] += 1
+
+            progress = progress_by_id.get(app_id)
+            if progress is None:
+                furthest = STAGE_RANK.get(status, 0)
+                rejected = status == REJECTED
+                for stage in FUNNEL_STAGES[:furthest + 1]:
+                    funnel[(position, stage)] += 1
+                if rejected:
+                    funnel[(position, REJECTED)] += 1
+                progress_rows.append((app_id, position, furthest, rejected, applied))
+                continue
+
+            old_position, furthest, rejected, since = progress
+            if old_position != position:
+                reached = FUNNEL_STAGES[:furthest + 1] + ([REJECTED] if rejected else [])
+                for stage in reached:
+                    funnel[(old_position, stage)] -= 1
+                    funnel[(position, stage)] += 1
+            if status != before[1]:
+                days = max(0.0, (at - _started(since)).total_seconds() / 86400)
+                events.append((app_id, before[1], status, changed_at, days, batch_id, actor, reason))
+                bucket = (before[1], stage_time_bucket(days))
+                stage_time[bucket] += 1
+                stage_days[bucket] += days
+                rank = STAGE_RANK.get(status)
+                if rank is not None and rank > furthest:
+                    for stage in FUNNEL_STAGES[furthest + 1:rank + 1]:
+                        funnel[(position, stage)] += 1
+                    furthest = rank
+                if status == REJECTED and not rejected:
+                    funnel[(position, REJECTED)] += 1
+                    rejected = True
+                since = changed_at
+            progress_rows.append((app_id, position, furthest, rejected, since))
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO app_progress (app_id, position, furthest, rejected, stage_since) "
+            "VALUES (?, ?, ?, ?, ?)",
+            progress_rows,
+        )
+        conn.executemany(
+            "INSERT INTO status_events "
+            "(app_id, old_status, new_status, changed_at, days_in_stage, batch_id, actor, reason) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            events,
+        )
+        conn.executemany(
+            "INSERT INTO rollup_daily (day, position, applications) VALUES (?, ?, ?) "
+            "ON CONFLICT(day, position) DO UPDATE SET applications = applications + excluded.applications",
+            [(day, position, count) for (day, position), count in daily.items() if count],
+        )
+        conn.executemany(
+            "INSERT INTO rollup_funnel (position, stage, applications) VALUES (?, ?, ?) "
+            "ON CONFLICT(position, stage) DO UPDATE SET applications = applications + excluded.applications",
+            [(position, stage, count) for (position, stage), count in funnel.items() if count],
+        )
+        conn.executemany(
+            "INSERT INTO rollup_stage_time (stage, bucket, transitions, total_days) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(stage, bucket) DO UPDATE SET "
+            "transitions = transitions + excluded.transitions, total_days = total_days + excluded.total_days",
+            [(stage, bucket, count, stage_days[(stage, bucket)]) for (stage, bucket), count in stage_time.items()],
+        )
+        return batch_id
+
+
+# ===== QUERIES =====
+class RecruitmentAnalytics:
+    """Read side of the rollups for the analytics page.
+
+    Every query reads the small rollup tables, never the applications
+    table, so their cost depends on the number of days, positions and
+    stages rather than the number of applications or status changes.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def positions(self):
+        rows = self.store.query(
+            "SELECT DISTINCT position FROM rollup_funnel WHERE applications > 0 ORDER BY position"
+        )
+        return [row[0] for row in rows]
+
+    def applications_over_time(self, period="day", positions=None, date_from=None, date_to=None):
+        """[(period start, position, applications)] per day or per week (starting Monday)."""
+        if period == "day":
+            bucket = "day"
+        elif period == "week":
+            bucket = "date(day, 'weekday 0', '-6 days')"
+        else:
+            raise ValueError(f"Unknown period {period!r}; use 'day' or 'week'")
+        where, params = ["applications > 0"], []
+        if positions:
+            where.append(f"position IN ({', '.join('?' for _ in positions)})")
+            params.extend(positions)
+        if date_from:
+            where.append("day >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            where.append("day <= ?")
+            params.append(date_to.isoformat())
+        rows = self.store.query(
+            f"SELECT {bucket} AS period, position, SUM(applications) FROM rollup_daily "
+            f"WHERE {' AND '.join(where)} GROUP BY period, position ORDER BY period, position",
+            params,
+        )
+        return [(date.fromisoformat(start), position, count) for start, position, count in rows]
+
+    def funnel(self, positions=None):
+        """[(stage, applications that reached it, conversion from the previous stage)].
+
+        Rejected is listed last, with its share of all applications as the
+        conversion.
+        """
+        sql = "SELECT stage, SUM(applications) FROM rollup_funnel"
+        params = []
+        if positions:
+            sql += f" WHERE position IN ({', '.join('?' for _ in positions)})"
+            params.extend(positions)
+        reached = dict(self.store.query(sql + " GROUP BY stage", params))
+        rows = []
+        previous = None
+        for stage in FUNNEL_STAGES:
+            count = reached.get(stage, 0)
+            rows.append((stage, count, count / previous if previous else None))
+            previous = count
+        started = reached.get(FUNNEL_STAGES[0], 0)
+        rejected = reached.get(REJECTED, 0)
+        rows.append((REJECTED, rejected, rejected / started if started else None))
+        return rows
+
+    def stage_time_distribution(self):
+        """{stage: [(bucket label, transitions)]} plus the mean days spent in each stage."""
+        rows = self.store.query(
+            "SELECT stage, bucket, transitions, total_days FROM rollup_stage_time "
+            "WHERE transitions > 0 ORDER BY stage, bucket"
+        )
+        histogram = {}
+        totals = Counter()
+        days = Counter()
+        for stage, bucket, transitions, total_days in rows:
+            histogram.setdefault(stage, []).append((bucket_label(bucket), transitions))
+            totals[stage] += transitions
+            days[stage] += total_days
+        means = {stage: days[stage] / totals[stage] for stage in totals}
+        return histogram, means
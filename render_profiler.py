@@ -0,0 +1,327 @@
+"""
+Kwazi's Fiber Bliss - Render Profiler
+Opt-in timing of each page and section of a Streamlit rerun, with counts
+of the elements sent to the browser and their payload size
+
+Turn it on with the environment variable KFB_PROFILE=1 (every session) or
+by opening the app with ?profile=1 (that session only). Set
+KFB_METRICS_PORT to also serve /metrics (Prometheus text) and
+/metrics.json on localhost.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lazy_imports import import_timings, importtime_report, loaded_heavy_modules
+
+logger = logging.getLogger(__name__)
+
+_current = threading.local()
+
+
+# ===== ELEMENT COUNTING =====
+def _install_element_hook():
+    """Wrap Streamlit's DeltaGenerator._enqueue so profiled runs can count elements.
+
+    This relies on a private Streamlit method; if it is missing the profiler
+    still records timings and just reports no element counts.
+    """
+    try:
+        from streamlit.delta_generator import DeltaGenerator
+    except ImportError:
+        return False
+    original = getattr(DeltaGenerator, "_enqueue", None)
+    if original is None:
+        return False
+    if getattr(original, "_kfb_profiled", False):
+        return True
+
+    def _enqueue(self, delta_type, element_proto, *args, **kwargs):
+        recorder = getattr(_current, "recorder", None)
+        if recorder is not None:
+            try:
+                size = element_proto.ByteSize()
+            except AttributeError:
+                size = 0
+            recorder.count_element(size)
+        return original(self, delta_type, element_proto, *args, **kwargs)
+
+    _enqueue._kfb_profiled = True
+    DeltaGenerator._enqueue = _enqueue
+    return True
+
+
+# ===== ONE RERUN =====
+class RunRecorder:
+    """Collects section timings and element counts for a single rerun."""
+
+    def __init__(self, profiler, app, page=""):
+        self.profiler = profiler
+        self.app = app
+        self.page = page
+        self.sections = []
+        self._stack = []
+        self._mark = None
+        self._started = time.perf_counter()
+        self.elements = 0
+        self.payload_bytes = 0
+        _current.recorder = self
+
+    def count_element(self, size):
+        self.elements += 1
+        self.payload_bytes += size
+        if self._stack:
+            self._stack[-1]["elements"] += 1
+            self._stack[-1]["bytes"] += size
+
+    @contextmanager
+    def section(self, name):
+        entry = {"section": name, "seconds": 0.0, "elements": 0, "bytes": 0}
+        self._stack.append(entry)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry["seconds"] = time.perf_counter() - started
+            self._stack.pop()
+            if self._stack:
+                # Nested sections also count towards their parent
+                self._stack[-1]["elements"] += entry["elements"]
+                self._stack[-1]["bytes"] += entry["bytes"]
+            self.sections.append(entry)
+
+    def mark(self, name):
+        """End the previous marked section and start a new one.
+
+        Lets a flat top-to-bottom script be split into sections without
+        re-indenting it; ``section()`` blocks can still nest inside a mark.
+        """
+        self._end_mark()
+        entry = {"section": name, "seconds": 0.0, "elements": 0, "bytes": 0}
+        self._stack.append(entry)
+        self._mark = (entry, time.perf_counter())
+
+    def _end_mark(self):
+        if self._mark is None:
+            return
+        entry, started = self._mark
+        entry["seconds"] = time.perf_counter() - started
+        self._stack.remove(entry)
+        self.sections.append(entry)
+        self._mark = None
+
+    def finish(self):
+        """Stop counting and add this run to the profiler's totals."""
+        self._end_mark()
+        if getattr(_current, "recorder", None) is self:
+            _current.recorder = None
+        total = time.perf_counter() - self._started
+        self.profiler.record(self, total)
+        return total
+
+
+class _NullRun:
+    """Stand-in used when profiling is off; every call is a no-op."""
+
+    page = ""
+    sections = ()
+
+    def section(self, name):
+        return nullcontext()
+
+    def mark(self, name):
+        pass
+
+    def finish(self):
+        return 0.0
+
+
+NULL_RUN = _NullRun()
+
+
+# ===== AGGREGATES =====
+class RenderProfiler:
+    """Process-wide totals of rerun timings, shared by every session."""
+
+    def __init__(self, recent=500):
+        self._lock = threading.Lock()
+        self.hook_installed = _install_element_hook()
+        self.totals = defaultdict(lambda: {"runs": 0, "seconds": 0.0, "max_seconds": 0.0, "elements": 0, "bytes": 0})
+        self.recent = defaultdict(lambda: deque(maxlen=recent))
+        self.last_run = None
+        self._server = None
+
+    @staticmethod
+    def enabled_for(query_params=None):
+        if os.environ.get("KFB_PROFILE") == "1":
+            return True
+        return bool(query_params) and query_params.get("profile") == "1"
+
+    def run(self, app, enabled=True):
+        """Start recording a rerun, or return a no-op recorder when disabled."""
+        if not enabled:
+            return NULL_RUN
+        return RunRecorder(self, app)
+
+    def record(self, run, total_seconds):
+        rows = list(run.sections) + [
+            {"section": "total", "seconds": total_seconds, "elements": run.elements, "bytes": run.payload_bytes}
+        ]
+        with self._lock:
+            for row in rows:
+                key = (run.app, run.page, row["section"])
+                agg = self.totals[key]
+                agg["runs"] += 1
+                agg["seconds"] += row["seconds"]
+                agg["max_seconds"] = max(agg["max_seconds"], row["seconds"])
+                agg["elements"] += row["elements"]
+                agg["bytes"] += row["bytes"]
+            self.recent[(run.app, run.page)].append(total_seconds)
+            self.last_run = {"app": run.app, "page": run.page, "sections": rows}
+
+    # ===== EXPORTS =====
+    def percentiles(self, app, page):
+        with self._lock:
+            samples = sorted(self.recent.get((app, page), ()))
+        if not samples:
+            return {}
+        pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+        return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "samples": len(samples)}
+
+    def to_dict(self):
+        with self._lock:
+            totals = [
+                {"app": app, "page": page, "section": section, **agg}
+                for (app, page, section), agg in sorted(self.totals.items())
+            ]
+            pages = sorted(self.recent)
+        return {
+            "element_counts": self.hook_installed,
+            "totals": totals,
+            "latency": [{"app": app, "page": page, **self.percentiles(app, page)} for app, page in pages],
+            "last_run": self.last_run,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self):
+        """Render the totals in the Prometheus text exposition format."""
+        def labels(app, page, section):
+            escape = lambda value: value.replace("\\", "\\\\").replace('"', '\\"')
+            return f'app="{escape(app)}",page="{escape(page)}",section="{escape(section)}"'
+
+        metrics = [
+            ("kfb_render_runs_total", "counter", "Profiled reruns that went through this section", "runs"),
+            ("kfb_render_seconds_total", "counter", "Time spent rendering this section", "seconds"),
+            ("kfb_render_seconds_max", "gauge", "Slowest single render of this section", "max_seconds"),
+            ("kfb_render_elements_total", "counter", "Streamlit elements emitted by this section", "elements"),
+            ("kfb_render_payload_bytes_total", "counter", "Serialized size of those elements", "bytes"),
+        ]
+        with self._lock:
+            items = sorted(self.totals.items())
+        lines = []
+        for name, kind, help_text, field in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, agg in items:
+                lines.append(f"{name}{{{labels(*key)}}} {agg[field]}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve /metrics and /metrics.json from a background thread (once per process)."""
+        if self._server is not None:
+            return
+        profiler = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = profiler.to_prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = profiler.to_json(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as error:
+            logger.warning("Could not serve render metrics on port %s: %s", port, error)
+            return
+        threading.Thread(target=self._server.serve_forever, name="render-metrics", daemon=True).start()
+
+
+def _markdown_table(rows):
+    """A markdown table, so the panel itself never pulls pandas into the process."""
+    if not rows:
+        return ""
+    columns = list(rows[0])
+    lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    lines.extend("| " + " | ".join(str(row[column]) for column in columns) + " |" for row in rows)
+    return "\n".join(lines)
+
+
+def render_debug_panel(st, profiler):
+    """Show the last profiled rerun and running totals in a sidebar expander."""
+    with st.sidebar.expander("⏱️ Render profile"):
+        last = profiler.last_run
+        if last is None:
+            st.write("No profiled reruns yet.")
+            return
+        st.write(f"**Last rerun:** {last['page'] or last['app']}")
+        st.markdown(_markdown_table([
+            {
+                "Section": row["section"],
+                "ms": round(row["seconds"] * 1000, 2),
+                "Elements": row["elements"],
+                "Bytes": row["bytes"],
+            }
+            for row in last["sections"]
+        ]))
+        latency = profiler.percentiles(last["app"], last["page"])
+        if latency:
+            st.write(
+                f"p50 {latency['p50'] * 1000:.1f} ms · p95 {latency['p95'] * 1000:.1f} ms · "
+                f"p99 {latency['p99'] * 1000:.1f} ms over {latency['samples']} reruns"
+            )
+        if not profiler.hook_installed:
+            st.caption("Element counts are unavailable in this Streamlit version.")
+
+        st.write("**Deferred imports**")
+        heavy = loaded_heavy_modules()
+        st.caption(f"Loaded in this process: {', '.join(heavy) if heavy else 'none of the heavy libraries'}")
+        timings = import_timings()
+        if timings:
+            st.markdown(_markdown_table([
+                {
+                    "Module": timing["module"],
+                    "ms": round(timing["seconds"] * 1000, 1),
+                    "Modules loaded": timing["modules_loaded"],
+                    "First needed by": timing["reason"],
+                }
+                for timing in timings
+            ]))
+            module = timings[0]["module"]
+            if st.button(f"Cold import breakdown for {module}"):
+                st.markdown(_markdown_table([
+                    {"Module": row["module"], "self ms": row["self_us"] / 1000, "cumulative ms": row["cumulative_us"] / 1000}
+                    for row in importtime_report(module)
+                ]))
+        st.download_button("Download JSON", profiler.to_json(), "render_profile.json", "application/json")
+        st.download_button("Download Prometheus text", profiler.to_prometheus(), "render_profile.prom", "text/plain")
@@ -0,0 +1,127 @@
+"""
+Kwazi's Fiber Bliss - Resume Storage
+Content-addressed resume files: streamed to disk in chunks, stored once per
+unique file and read back through memory maps
+"""
+
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024
+MAX_FILE_BYTES = 5 * 1024 * 1024           # keep in step with server.maxUploadSize
+MAX_TOTAL_BYTES = 2 * 1024 * 1024 * 1024
+
+
+class ResumeTooLarge(Exception):
+    """Raised when a single resume is bigger than the per-file limit."""
+
+
+class ResumeStorageFull(Exception):
+    """Raised when storing a resume would exceed the total storage limit."""
+
+
+def _split_key(key):
+    """Keys look like "<sha256><suffix>", e.g. "9f86d0...0f00a08.pdf"."""
+    digest, _, suffix = key.partition(".")
+    return digest, ("." + suffix if suffix else "")
+
+
+class ResumeStore:
+    """Resume files stored under the SHA-256 of their contents.
+
+    Identical uploads map to the same file, so a resume sent with several
+    applications is only kept once.
+    """
+
+    def __init__(self, root, max_file_bytes=MAX_FILE_BYTES, max_total_bytes=MAX_TOTAL_BYTES, chunk_size=CHUNK_SIZE):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self.total_bytes = sum(
+            path.stat().st_size for path in self.root.glob("??/*") if path.is_file()
+        )
+
+    def path_for(self, key):
+        digest, _ = _split_key(key)
+        return self.root / digest[:2] / digest
+
+    # ===== LIMITS =====
+    def check_size(self, size):
+        """Reject a resume up front when its size is already known to be too big."""
+        if size is None:
+            return
+        if size > self.max_file_bytes:
+            raise ResumeTooLarge(
+                f"Resume is {size / 1_048_576:.1f} MB; the limit is {self.max_file_bytes / 1_048_576:.0f} MB"
+            )
+        if self.total_bytes + size > self.max_total_bytes:
+            raise ResumeStorageFull("Resume storage is full")
+
+    # ===== WRITES =====
+    def save(self, fileobj, filename="", size=None):
+        """Stream ``fileobj`` to disk and return the resume key.
+
+        The file is copied in ``chunk_size`` pieces while being hashed, so at
+        most one chunk is held in memory here. Copying stops as soon as the
+        per-file limit is passed.
+        """
+        self.check_size(size)
+        suffix = Path(filename).suffix.lower()
+        sha = hashlib.sha256()
+        written = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while True:
+                    chunk = fileobj.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > self.max_file_bytes:
+                        raise ResumeTooLarge(
+                            f"Resume is larger than {self.max_file_bytes / 1_048_576:.0f} MB"
+                        )
+                    sha.update(chunk)
+                    tmp.write(chunk)
+            digest = sha.hexdigest()
+            key = digest + suffix
+            final = self.path_for(key)
+            with self._lock:
+                if final.exists():
+                    os.unlink(tmp_name)
+                    return key
+                if self.total_bytes + written > self.max_total_bytes:
+                    raise ResumeStorageFull("Resume storage is full")
+                final.parent.mkdir(exist_ok=True)
+                os.replace(tmp_name, final)
+                self.total_bytes += written
+            return key
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    # ===== READS =====
+    def exists(self, key):
+        return self.path_for(key).exists()
+
+    @contextmanager
+    def open_mmap(self, key):
+        """Map a stored resume read-only; yields an mmap (empty files yield b"")."""
+        with open(self.path_for(key), "rb") as handle:
+            if os.fstat(handle.fileno()).st_size == 0:
+                yield b""
+                return
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
@@ -0,0 +1,460 @@
+"""
+Kwazi's Fiber Bliss - Shared Cache
+A cache that several Streamlit server processes can share, with versioned
+keys and invalidation broadcasts
+
+Pick a backend with KFB_CACHE_URL:
+    sqlite:///path/to/cache.db   a file every process on the host can open
+    sqlite://                    the same, at the app's default path
+    memory://                    this process only (development)
+    redis://host:6379/0          any server speaking the Redis protocol
+
+For trying the Redis adapter without Redis, start a local stand-in:
+    python shared_cache.py --serve 6379
+"""
+
+import argparse
+import logging
+import pickle
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+VERSION_CHECK_INTERVAL = 1.0      # seconds between checks for other processes' invalidations
+DEFAULT_TTL = 3600.0              # seconds an entry set without its own ttl is kept
+PURGE_INTERVAL = 300.0            # seconds between sweeps of expired entries on backends that need them
+
+
+# ===== BACKENDS =====
+# A backend stores bytes by string key and has get, set, delete and incr.
+# incr keeps a counter as an integer and returns the new value. Backends
+# that don't expire entries by themselves also have purge_expired.
+class LocalBackend:
+    """In-process dictionary; nothing is shared, but the cache API behaves the same."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value, expires_at = self._data.get(key, (0, None))
+            value = int(value) + 1
+            self._data[key] = (value, expires_at)
+            return value
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for key in [key for key, (_, expires_at) in self._data.items()
+                        if expires_at is not None and expires_at <= now]:
+                del self._data[key]
+
+
+class SQLiteBackend:
+    """A WAL-mode SQLite file that every process on the host opens."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared_cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM shared_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return row[0]
+
+    def set(self, key, value, ttl=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO shared_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl if ttl else None),
+            )
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM shared_cache WHERE key = ?", (key,))
+
+    def incr(self, key):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO shared_cache (key, value) VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+                (key,),
+            )
+            return self._conn.execute(
+                "SELECT value FROM shared_cache WHERE key = ?", (key,)
+            ).fetchone()[0]
+
+    def purge_expired(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM shared_cache WHERE expires_at <= ?", (time.time(),))
+
+
+class RespError(Exception):
+    """An error reply from a Redis-protocol server."""
+
+
+def _encode_command(*args):
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _read_reply(reader):
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by the cache server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(rest)
+        return None if count < 0 else [_read_reply(reader) for _ in range(count)]
+    raise RespError(f"Unexpected reply {line!r}")
+
+
+class RedisBackend:
+    """Minimal Redis-protocol (RESP2) client: GET, SET with PX, DEL and INCR.
+
+    One connection is shared under a lock and reopened after a network
+    error, so a restarted server is picked up on the next call.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._reader = None
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        if self.db:
+            self._send("SELECT", self.db)
+
+    def _send(self, *args):
+        self._sock.sendall(_encode_command(*args))
+        return _read_reply(self._reader)
+
+    def command(self, *args):
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._send(*args)
+            except (OSError, ConnectionError):
+                self.close()
+                raise
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._reader = None
+
+    def get(self, key):
+        return self.command("GET", key)
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self.command("SET", key, value, "PX", int(ttl * 1000))
+        else:
+            self.command("SET", key, value)
+
+    def delete(self, key):
+        self.command("DEL", key)
+
+    def incr(self, key):
+        return self.command("INCR", key)
+
+
+# ===== LOCAL STAND-IN SERVER =====
+class _RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        backend = self.server.backend
+        while True:
+            try:
+                command = _read_reply(self.rfile)
+            except (ConnectionError, RespError, ValueError):
+                return
+            if not command:
+                return
+            name = command[0].decode().upper()
+            args = command[1:]
+            try:
+                if name == "PING":
+                    reply = b"+PONG\r\n"
+                elif name == "SELECT":
+                    reply = b"+OK\r\n"
+                elif name == "GET":
+                    value = backend.get(args[0].decode())
+                    if value is None:
+                        reply = b"$-1\r\n"
+                    else:
+                        value = value if isinstance(value, bytes) else str(value).encode()
+                        reply = b"$%d\r\n%s\r\n" % (len(value), value)
+                elif name == "SET":
+                    ttl = int(args[3]) / 1000 if len(args) >= 4 and args[2].upper() == b"PX" else None
+                    backend.set(args[0].decode(), args[1], ttl)
+                    reply = b"+OK\r\n"
+                elif name == "DEL":
+                    for key in args:
+                        backend.delete(key.decode())
+                    reply = b":%d\r\n" % len(args)
+                elif name == "INCR":
+                    reply = b":%d\r\n" % backend.incr(args[0].decode())
+                else:
+                    reply = f"-ERR unknown command '{name}'\r\n".encode()
+            except (IndexError, ValueError) as error:
+                reply = f"-ERR {error}\r\n".encode()
+            self.wfile.write(reply)
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """A tiny Redis-protocol server over a LocalBackend, for testing RedisBackend locally."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=6379):
+        self.backend = LocalBackend()
+        super().__init__((host, port), _RespHandler)
+
+
+# ===== CACHE =====
+class SharedCache:
+    """Namespaced, versioned cache over a backend.
+
+    Keys are stored as ``namespace:v<version>:key``. ``invalidate``
+    increments a namespace's version in the backend, which makes every
+    older entry unreachable at once in every process, and deletes the
+    entries this process stored under the old version. Each process checks
+    the versions of the namespaces it uses at most every
+    ``check_interval`` seconds and calls the callbacks registered with
+    ``subscribe`` when one has moved on, which is how invalidations are
+    broadcast.
+
+    Every entry expires, after ``default_ttl`` seconds unless the caller
+    passes its own ``ttl``, so entries other processes left under old
+    versions don't pile up; backends that only drop expired entries when
+    they are read are swept every ``PURGE_INTERVAL`` seconds from ``poll``.
+
+    Backend failures are logged and treated as cache misses, so a cache
+    outage slows the apps down rather than breaking them. Objects are
+    pickled; only point this at a backend the apps alone can write to.
+    """
+
+    def __init__(self, backend, check_interval=VERSION_CHECK_INTERVAL, default_ttl=DEFAULT_TTL):
+        self.backend = backend
+        self.check_interval = check_interval
+        self.default_ttl = default_ttl
+        self._versions = {}
+        self._subscribers = {}
+        self._stored = {}                 # namespace -> keys this process set under the current version
+        self._pending = {}                # namespace -> timer of a coalesced invalidation
+        self._last_invalidated = {}
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._next_purge = time.monotonic() + PURGE_INTERVAL
+
+    def _call(self, method, *args, default=None):
+        try:
+            return getattr(self.backend, method)(*args)
+        except (OSError, ConnectionError, RespError, sqlite3.Error) as error:
+            logger.warning("Shared cache %s failed: %s", method, error)
+            return default
+
+    def _stored_version(self, namespace):
+        return int(self._call("get", f"version:{namespace}") or 0)
+
+    def version(self, namespace):
+        self.poll()
+        with self._lock:
+            if namespace in self._versions:
+                return self._versions[namespace]
+        version = self._stored_version(namespace)
+        with self._lock:
+            return self._versions.setdefault(namespace, version)
+
+    def _key(self, namespace, key):
+        return f"{namespace}:v{self.version(namespace)}:{key}"
+
+    # ===== VALUES =====
+    def get(self, namespace, key):
+        """Raw bytes stored under ``key`` for the current version of ``namespace``."""
+        value = self._call("get", self._key(namespace, key))
+        return bytes(value) if value is not None else None
+
+    def set(self, namespace, key, value, ttl=None):
+        stored_key = self._key(namespace, key)
+        self._call("set", stored_key, value, ttl or self.default_ttl)
+        with self._lock:
+            self._stored.setdefault(namespace, set()).add(stored_key)
+
+    def get_or_build(self, namespace, key, build, ttl=None):
+        """Return the cached object for ``key``, building and storing it on a miss."""
+        data = self.get(namespace, key)
+        if data is not None:
+            try:
+                return pickle.loads(data)
+            except Exception:
+                logger.warning("Discarding unreadable shared cache entry %s:%s", namespace, key)
+        value = build()
+        self.set(namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+        return value
+
+    # ===== INVALIDATION =====
+    def invalidate(self, namespace, within=0):
+        """Drop every entry in ``namespace`` for all processes.
+
+        With ``within``, a call less than that many seconds after the last
+        invalidation of ``namespace`` is put off until the time is up, and
+        any further calls meanwhile are merged into it, so a burst of
+        writes costs the other processes one reload instead of one each.
+        """
+        if within:
+            with self._lock:
+                if namespace in self._pending:
+                    return
+                wait = self._last_invalidated.get(namespace, float("-inf")) + within - time.monotonic()
+                if wait > 0:
+                    timer = threading.Timer(wait, self._invalidate_now, (namespace,))
+                    timer.daemon = True
+                    self._pending[namespace] = timer
+                    timer.start()
+                    return
+        self._invalidate_now(namespace)
+
+    def _invalidate_now(self, namespace):
+        with self._lock:
+            self._pending.pop(namespace, None)
+            self._last_invalidated[namespace] = time.monotonic()
+            stale = self._stored.pop(namespace, set())
+        version = self._call("incr", f"version:{namespace}")
+        if version is not None:
+            with self._lock:
+                self._versions[namespace] = int(version)
+        for key in stale:
+            self._call("delete", key)
+
+    def flush_invalidations(self):
+        """Run every invalidation ``invalidate(within=...)`` has put off; for shutdown and tests."""
+        with self._lock:
+            pending = list(self._pending.items())
+        for namespace, timer in pending:
+            timer.cancel()
+            self._invalidate_now(namespace)
+
+    def subscribe(self, namespace, callback):
+        """Call ``callback()`` when another process invalidates ``namespace``."""
+        with self._lock:
+            self._subscribers.setdefault(namespace, []).append(callback)
+        self.version(namespace)
+
+    def poll(self):
+        """Pick up other processes' invalidations; runs at most every ``check_interval``."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            namespaces = list(self._versions)
+            purge = now >= self._next_purge and hasattr(self.backend, "purge_expired")
+            if purge:
+                self._next_purge = now + PURGE_INTERVAL
+        if purge:
+            self._call("purge_expired")
+        changed = []
+        for namespace in namespaces:
+            version = self._stored_version(namespace)
+            with self._lock:
+                if version != self._versions.get(namespace):
+                    self._versions[namespace] = version
+                    changed.extend(self._subscribers.get(namespace, ()))
+        for callback in changed:
+            callback()
+
+
+def open_shared_cache(url, default_path):
+    """Build a SharedCache from a KFB_CACHE_URL value, or return None if it is empty."""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return SharedCache(LocalBackend())
+    if parsed.scheme == "sqlite":
+        return SharedCache(SQLiteBackend(parsed.path or default_path))
+    if parsed.scheme == "redis":
+        db = int(parsed.path.strip("/") or 0)
+        return SharedCache(RedisBackend(parsed.hostname or "127.0.0.1", parsed.port or 6379, db))
+    raise ValueError(f"Unsupported KFB_CACHE_URL {url!r}; use sqlite://, memory:// or redis://")
+
+
+# ===== COMMAND LINE =====
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local Redis-protocol stand-in for the shared cache.")
+    parser.add_argument("--serve", type=int, metavar="PORT", required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args(argv)
+    with RespStandIn(args.host, args.serve) as server:
+        print(f"Shared cache stand-in listening on redis://{args.host}:{args.serve}/0")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
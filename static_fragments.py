@@ -0,0 +1,81 @@
+"""
+Kwazi's Fiber Bliss - Static Fragments
+Compiles the static sections of a page into single markdown blobs once per
+process, so each section is sent to the browser as one element
+"""
+
+import hashlib
+import re
+import threading
+
+_compiled = {}
+_lock = threading.Lock()
+
+LIVE_FIELD = re.compile(r"\{(\w+)\}")
+
+
+class StaticFragment:
+    """A compiled section. ``{name}`` placeholders are filled in by ``render``."""
+
+    def __init__(self, markdown):
+        self.markdown = markdown
+        self.live_fields = set(LIVE_FIELD.findall(markdown))
+
+    def render(self, **live):
+        """Return the section text, substituting only the live placeholders."""
+        if not self.live_fields:
+            return self.markdown
+        return LIVE_FIELD.sub(
+            lambda match: str(live[match.group(1)]) if match.group(1) in live else match.group(0),
+            self.markdown,
+        )
+
+
+def _cached(source, build):
+    key = hashlib.sha1(source.encode("utf-8")).hexdigest()
+    fragment = _compiled.get(key)
+    if fragment is None:
+        with _lock:
+            fragment = _compiled.setdefault(key, build())
+    return fragment
+
+
+def compile_section(title, lines, css_class="section"):
+    """Compile a section heading plus its ``st.write``-style lines.
+
+    Each line becomes its own paragraph, consecutive "- " lines become one
+    list and empty lines are dropped, matching what the separate
+    ``st.write`` calls used to show. Unless ``css_class`` is None the
+    result is wrapped in a ``<div class="{css_class}">`` so the page CSS
+    applies to the whole section. Compiled fragments are cached by a hash
+    of their content.
+    """
+    source = "\n".join([css_class or "", title, *lines])
+
+    def build():
+        blocks = []
+        for line in lines:
+            if not line:
+                continue
+            if line.startswith("- ") and blocks and blocks[-1].startswith("- "):
+                blocks[-1] += "\n" + line
+            else:
+                blocks.append(line)
+        body = "\n\n".join(blocks)
+        heading = f"### {title}\n\n" if title else ""
+        if css_class is None:
+            return StaticFragment(heading + body)
+        return StaticFragment(f'<div class="{css_class}">\n\n{heading}{body}\n\n</div>')
+
+    return _cached(source, build)
+
+
+def compile_css(css):
+    """Strip comments and collapse whitespace in a page's CSS block, once."""
+    def build():
+        text = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+        text = re.sub(r"\s+", " ", text)
+        text = re.sub(r"\s*([{}:;,])\s*", r"\1", text)
+        return StaticFragment(f"<style>{text.strip()}</style>")
+
+    return _cached("css\n" + css, build)
@@ -0,0 +1,82 @@
+"""
+Kwazi's Fiber Bliss - Status Transitions
+Which application status changes are allowed, and bulk transitions
+selected with vectorized masks over the compact application frame
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from application_frame import DATE_COLUMN, app_ids
+
+# Status -> the statuses an application in it may move to
+ALLOWED_TRANSITIONS = {
+    "New": {"Under Review", "Rejected"},
+    "Under Review": {"Interview Scheduled", "Rejected"},
+    "Interview Scheduled": {"Offer", "Rejected"},
+    "Offer": {"Rejected"},            # offer withdrawn or declined
+    "Rejected": {"Under Review"},     # reopened
+}
+STATUSES = list(ALLOWED_TRANSITIONS)
+
+
+class TransitionError(ValueError):
+    """Raised when a status change isn't allowed by ALLOWED_TRANSITIONS."""
+
+
+def can_transition(old_status, new_status):
+    return new_status in ALLOWED_TRANSITIONS.get(old_status, ())
+
+
+def check_transition(old_status, new_status):
+    if not can_transition(old_status, new_status):
+        raise TransitionError(f"Applications can't move from {old_status!r} to {new_status!r}")
+
+
+def sources_of(new_status):
+    """The statuses an application may be in to move to ``new_status``."""
+    return {old for old, targets in ALLOWED_TRANSITIONS.items() if new_status in targets}
+
+
+@dataclass(frozen=True)
+class TransitionPlan:
+    """The applications a bulk transition will move, and how many it had to leave alone."""
+
+    new_status: str
+    from_statuses: tuple
+    app_ids: list
+    not_allowed: int
+
+    def __len__(self):
+        return len(self.app_ids)
+
+
+def plan_bulk_transition(frame, new_status, from_statuses, positions=(), older_than_days=0, today=None):
+    """Pick the rows of a compact application frame a bulk status change applies to.
+
+    Every condition is one boolean mask over whole columns (the categorical
+    ones compare integer codes), so planning a change to thousands of
+    applications costs a few array operations. Rows that match the filters
+    but whose status may not move to ``new_status`` are counted in
+    ``not_allowed`` rather than changed. Raises TransitionError if none of
+    ``from_statuses`` may move to ``new_status``.
+    """
+    from_statuses = tuple(from_statuses)
+    allowed = tuple(status for status in from_statuses if can_transition(status, new_status))
+    if not allowed:
+        raise TransitionError(
+            f"None of {', '.join(from_statuses) or 'the selected statuses'} may move to {new_status!r}"
+        )
+    mask = frame["Status"].isin(from_statuses)
+    if positions:
+        mask &= frame["Position"].isin(list(positions))
+    if older_than_days:
+        cutoff = (today or date.today()) - timedelta(days=older_than_days)
+        mask &= frame[DATE_COLUMN] < datetime.combine(cutoff, time())
+    permitted = mask & frame["Status"].isin(allowed)
+    return TransitionPlan(
+        new_status=new_status,
+        from_statuses=allowed,
+        app_ids=app_ids(frame[permitted]),
+        not_allowed=int(mask.sum() - permitted.sum()),
+    )
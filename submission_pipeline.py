@@ -0,0 +1,134 @@
+"""
+Kwazi's Fiber Bliss - Application Submission Pipeline
+Validates job applications and hands them to a background writer so the
+Streamlit rerun that handles the submit never waits on disk
+"""
+
+import json
+import logging
+import queue
+import re
+import threading
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from application_store import RESUME_NOT_SAVED
+from batch_writer import BatchWriter
+from resume_storage import ResumeStorageFull, ResumeTooLarge
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ["Applicant", "Email", "Phone", "Location", "Position"]
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+class PipelineBusy(Exception):
+    """Raised when the submission queue is full and the caller should retry later."""
+
+
+def validate_application(record):
+    """Return a list of problems with an application; empty means it is valid."""
+    errors = []
+    missing = [field for field in REQUIRED_FIELDS if not str(record.get(field, "")).strip()]
+    if missing:
+        errors.append("Please fill in all required fields (*)")
+    email = str(record.get("Email", "")).strip()
+    if email and not EMAIL_PATTERN.match(email):
+        errors.append("Please enter a valid email address")
+    phone_digits = re.sub(r"\D", "", str(record.get("Phone", "")))
+    if record.get("Phone") and len(phone_digits) < 9:
+        errors.append("Please enter a valid phone number")
+    return errors
+
+
+class SubmissionPipeline:
+    """Accept applications on the script thread and group-commit them to the store.
+
+    Application IDs are reserved from the store when an application is
+    submitted, so they are unique across server processes and imports. An
+    application that can't be written even on its own is appended to
+    ``dead_letter_path`` rather than lost. One whose resume can't be saved
+    is still stored, with ``RESUME_NOT_SAVED`` and the reason in its Resume
+    field so the Admin page can list it.
+    """
+
+    def __init__(self, store, resume_store, dead_letter_path=None, maxsize=1000, batch_size=100,
+                 flush_interval=0.5):
+        self.store = store
+        self.resume_store = resume_store
+        self.dead_letter_path = Path(dead_letter_path) if dead_letter_path else None
+        if self.dead_letter_path is not None:
+            self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+        self._dead_letter_lock = threading.Lock()
+        self._writer = BatchWriter(
+            self._write_batch,
+            maxsize=maxsize,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            name="application-writer",
+            dead_letter=self._dead_letter,
+        )
+
+    def submit(self, record, resume=None, timeout=0.2):
+        """Validate and queue one application, returning its new Application ID.
+
+        ``resume`` is a file-like object such as Streamlit's UploadedFile; it
+        is streamed into the resume store by the worker thread. Raises
+        ValueError with the validation messages if the application is
+        incomplete or the resume is too big, and PipelineBusy if the queue
+        stays full for ``timeout`` seconds.
+        """
+        errors = validate_application(record)
+        if resume is not None:
+            try:
+                self.resume_store.check_size(getattr(resume, "size", None))
+            except (ResumeTooLarge, ResumeStorageFull) as error:
+                errors.append(str(error))
+        if errors:
+            raise ValueError(errors)
+        record = dict(record)
+        record["Application ID"] = self.store.reserve_app_id()
+        record.setdefault("Status", "New")
+        record.setdefault("Applied Date", date.today())
+        try:
+            self._writer.put((record, resume), timeout=timeout)
+        except queue.Full:
+            raise PipelineBusy("Too many applications are being submitted right now") from None
+        return record["Application ID"]
+
+    def pending(self):
+        return self._writer.pending()
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        self._writer.close()
+
+    # ===== WORKER =====
+    def _write_batch(self, items):
+        records = []
+        for record, resume in items:
+            if resume is not None:
+                try:
+                    resume.seek(0)
+                    record["Resume"] = self.resume_store.save(resume, getattr(resume, "name", ""))
+                except (ResumeTooLarge, ResumeStorageFull, OSError) as error:
+                    logger.exception("Could not store resume for %s", record["Application ID"])
+                    name = getattr(resume, "name", "") or "resume"
+                    record["Resume"] = f"{RESUME_NOT_SAVED}{name}: {error}"
+            records.append(record)
+        self.store.add_many(records)
+
+    def _dead_letter(self, item, error):
+        record, _ = item
+        logger.error("Could not save application %s", record["Application ID"])
+        if self.dead_letter_path is None:
+            return
+        line = json.dumps(
+            dict(record, failed_at=datetime.now(timezone.utc).isoformat(), error=repr(error)),
+            ensure_ascii=False,
+            default=str,
+        )
+        with self._dead_letter_lock, open(self.dead_letter_path, "a", encoding="utf-8") as log:
+            log.write(line + "\n")
@@ -0,0 +1,41 @@
+"""
+Kwazi's Fiber Bliss - Test Fixtures
+The modules live at the top of the repository, so tests import them from there
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from application_store import ApplicationStore  # noqa: E402
+
+
+def make_application(number, status="New", position="Lead Crochet Artisan", **fields):
+    return {
+        "Application ID": f"KFB-APP{number}",
+        "Applicant": f"Applicant {number}",
+        "Email": f"applicant{number}@example.com",
+        "Phone": "0662708613",
+        "Location": "Durban",
+        "Position": position,
+        "Status": status,
+        "Applied Date": date(2026, 1, 1),
+        **fields,
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "applications.db"
+
+
+@pytest.fixture
+def store(db_path):
+    store = ApplicationStore(db_path)
+    store.seed([make_application(1000 + i) for i in range(5)])
+    yield store
+    store.close()
@@ -0,0 +1,22 @@
+from conftest import make_application
+
+from application_frame import app_ids, count_by, load_application_frame, position_status_table
+from status_transitions import plan_bulk_transition
+
+
+def test_imported_ids_in_any_format_survive_the_frame(store):
+    imported = [make_application(1, status="Under Review"), make_application(2, status="Under Review")]
+    imported[0]["Application ID"] = "HR-17"
+    imported[1]["Application ID"] = "KFB-APP0012"
+    store.upsert_many(imported)
+
+    frame = load_application_frame(store, chunk_size=3)
+    assert sorted(app_ids(frame)) == sorted(["HR-17", "KFB-APP0012"] + [f"KFB-APP{1000 + i}" for i in range(5)])
+    assert count_by(frame, "Status") == {"New": 5, "Under Review": 2}
+    assert position_status_table(frame).loc["Lead Crochet Artisan", "Under Review"] == 2
+
+    plan = plan_bulk_transition(frame, "Rejected", ["Under Review"])
+    assert sorted(plan.app_ids) == ["HR-17", "KFB-APP0012"]
+    changed = store.bulk_update_status(plan.app_ids, "Rejected", plan.from_statuses)
+    assert sorted(record["Application ID"] for record in changed) == ["HR-17", "KFB-APP0012"]
+    assert store.get("KFB-APP0012")["Status"] == "Rejected"
@@ -0,0 +1,86 @@
+import csv
+from datetime import date
+
+import pytest
+
+from application_io import export_applications, import_applications
+from application_store import ApplicationStore
+from conftest import make_application
+
+
+@pytest.fixture
+def mixed_store(tmp_path):
+    store = ApplicationStore(tmp_path / "source.db")
+    store.seed([
+        make_application(1000 + i, status=status, position=position, **{"Applied Date": date(2026, 1, 1 + i)})
+        for i, (status, position) in enumerate([
+            ("New", "Lead Crochet Artisan"),
+            ("Under Review", "Lead Crochet Artisan"),
+            ("Under Review", "Yarn Dyer"),
+            ("Offer", "Lead Crochet Artisan"),
+            ("Under Review", "Lead Crochet Artisan"),
+        ])
+    ])
+    yield store
+    store.close()
+
+
+def write_rows(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.DictWriter(out, fieldnames=list(make_application(0)))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_filtered_export_round_trips(mixed_store, tmp_path, fmt):
+    path = tmp_path / f"export.{fmt}"
+    exported = export_applications(
+        mixed_store, path, statuses=["Under Review"], positions=["Lead Crochet Artisan"],
+        date_from=date(2026, 1, 2), date_to=date(2026, 1, 4), chunk_size=1,
+    )
+    assert exported == 1
+
+    target = ApplicationStore(tmp_path / "target.db")
+    try:
+        result = import_applications(target, path, chunk_size=1)
+        assert (result.imported, result.rejected) == (1, [])
+        assert target.get("KFB-APP1001") == mixed_store.get("KFB-APP1001")
+        assert len(target) == 1
+    finally:
+        target.close()
+
+
+def test_bad_rows_are_reported_and_the_rest_imported(store, tmp_path):
+    path = tmp_path / "hr_updates.csv"
+    write_rows(path, [
+        make_application(1000, status="Under Review"),
+        make_application(1001, status="Hird"),
+        make_application(1002, **{"Applied Date": "01/02/2024"}),
+        make_application(1005),
+    ])
+    result = import_applications(store, path, chunk_size=2)
+    assert result.imported == 2
+    assert [(row.where, row.app_id) for row in result.rejected] == [("line 3", "KFB-APP1001"), ("line 4", "KFB-APP1002")]
+    assert "unknown status 'Hird'" in result.rejected[0].reason
+    assert "'01/02/2024'" in result.rejected[1].reason
+    assert store.get("KFB-APP1000")["Status"] == "Under Review"
+    assert store.get("KFB-APP1001")["Status"] == "New"
+    assert store.get("KFB-APP1005") is not None
+
+
+def test_store_refuses_unknown_statuses(store):
+    with pytest.raises(ValueError, match="Hird"):
+        store.upsert_many([make_application(1000, status="Hird")])
+    assert store.get("KFB-APP1000")["Status"] == "New"
+
+
+def test_partial_records_update_only_their_fields(store):
+    before = store.get("KFB-APP1000")
+    assert store.upsert_many([{"Application ID": "KFB-APP1000"}]) == 1
+    assert store.get("KFB-APP1000") == before
+    store.upsert_many([{"Application ID": "KFB-APP1001", "Status": "Under Review"}])
+    assert store.get("KFB-APP1001")["Status"] == "Under Review"
+    with pytest.raises(ValueError, match="KFB-APP2000"):
+        store.upsert_many([{"Application ID": "KFB-APP2000", "Status": "New"}])
+    assert store.get("KFB-APP2000") is None
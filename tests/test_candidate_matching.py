@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import candidate_matching
+from candidate_matching import CandidateMatcher, JobVectors
+from conftest import make_application
+from job_catalog import load_catalog
+
+JOB_OPENINGS = Path(__file__).resolve().parent.parent / "job_openings.json"
+
+
+@pytest.fixture
+def catalog():
+    return load_catalog(JOB_OPENINGS)
+
+
+def applicant(number, level, why_join, **fields):
+    return make_application(number, **{"Crochet Experience": level, "Why Join": why_join, **fields})
+
+
+APPLICANTS = [
+    applicant(1, "Professional", "I lead a team making crochet patterns and check quality"),
+    applicant(2, "No experience", "I love social media, sales and talking to customers",
+              position="Sales & Marketing Coordinator"),
+    applicant(3, "Intermediate", "Attention to detail and neat handcraft", Availability="Immediately"),
+    applicant(4, "Beginner (self-taught)", ""),
+]
+
+
+def test_dense_and_sparse_scoring_agree(catalog, monkeypatch):
+    dense = JobVectors(catalog)
+    monkeypatch.setattr(candidate_matching, "DENSE_CELLS", 0)
+    sparse = JobVectors(catalog)
+    assert dense.dense is not None and sparse.dense is None
+    np.testing.assert_allclose(dense.score(APPLICANTS), sparse.score(APPLICANTS), atol=1e-6)
+
+
+def test_shortlist_ranks_the_best_fit_first(store, catalog):
+    store.add_many(APPLICANTS)
+    matcher = CandidateMatcher(store, lambda: catalog)
+    shortlist = matcher.shortlist("Lead Crochet Artisan")
+    assert shortlist[0][1]["Application ID"] == "KFB-APP1"
+    assert [score for score, _ in shortlist] == sorted((score for score, _ in shortlist), reverse=True)
+    assert matcher.best_jobs(APPLICANTS[0])[0][1] == "Lead Crochet Artisan"
+
+
+def test_rejected_applicants_leave_the_shortlist_and_others_move_up(store, catalog):
+    store.add_many([applicant(i, "Professional", "crochet patterns " * (i % 5), status="Under Review")
+                    for i in range(1, 11)])
+    matcher = CandidateMatcher(store, lambda: catalog, depth=4)
+    ranked = [record["Application ID"] for _, record in matcher.shortlist("Lead Crochet Artisan", limit=20)]
+    assert len(ranked) == 4
+
+    store.update_status(ranked[0], "Rejected")
+    after_one = [record["Application ID"] for _, record in matcher.shortlist("Lead Crochet Artisan", limit=20)]
+    assert after_one == ranked[1:]
+
+    # Rejecting everyone on the list must not leave it empty while eligible applicants remain
+    store.bulk_update_status(after_one, "Rejected", ["Under Review"])
+    after_bulk = [record["Application ID"] for _, record in matcher.shortlist("Lead Crochet Artisan", limit=20)]
+    assert len(after_bulk) == 4
+    assert not set(after_bulk) & set(ranked)
+
+    store.update_status(ranked[0], "Under Review")
+    reopened = [record["Application ID"] for _, record in matcher.shortlist("Lead Crochet Artisan", limit=20)]
+    assert reopened[0] == ranked[0]
@@ -0,0 +1,99 @@
+import io
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from image_cache import ImageCache
+
+
+@pytest.fixture
+def header_png(tmp_path):
+    """A local stand-in for the header image, so nothing here needs the network."""
+    path = tmp_path / "header.png"
+    Image.new("RGB", (1600, 800), (200, 120, 160)).save(path)
+    return path
+
+
+@pytest.fixture
+def image_server(header_png):
+    """Serves the fixture image on a free local port; ``delay`` slows every response down."""
+    body = header_png.read_bytes()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            server.requests += 1
+            time.sleep(server.delay)
+            if self.path != "/header.png":
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.requests = 0
+    server.delay = 0.0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def width_of(data):
+    with Image.open(io.BytesIO(data)) as image:
+        return image.width
+
+
+def test_local_file_is_resized_and_cached_on_disk(tmp_path, header_png):
+    cache = ImageCache(tmp_path / "images")
+    data = cache.get(header_png, 704)
+    assert width_of(data) == 704
+    assert ImageCache(tmp_path / "images").get(header_png, 704) == data  # a restart reads the disk copy
+
+
+def test_edited_local_file_is_not_served_from_memory(tmp_path, header_png):
+    cache = ImageCache(tmp_path / "images")
+    before = cache.get(header_png, 704)
+    stat = header_png.stat()
+    Image.new("RGB", (800, 800), (20, 40, 60)).save(header_png)
+    os.utime(header_png, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    after = cache.get(header_png, 704)
+    assert after != before
+    with Image.open(io.BytesIO(after)) as image:
+        assert image.size == (704, 704)
+
+
+def test_remote_image_is_fetched_in_the_background_once(tmp_path, image_server):
+    image_server.delay = 0.5
+    cache = ImageCache(tmp_path / "images")
+    url = f"{image_server.url}/header.png"
+    started = time.monotonic()
+    assert cache.get(url, 704) is None
+    assert cache.get(url, 704) is None
+    assert time.monotonic() - started < 0.2
+    assert cache.wait(timeout=5)
+    assert width_of(cache.get(url, 704)) == 704
+    assert image_server.requests == 1
+
+
+def test_unreachable_image_is_not_retried_on_every_rerun(tmp_path, image_server):
+    cache = ImageCache(tmp_path / "images")
+    url = f"{image_server.url}/missing.png"
+    assert cache.get(url, 704) is None
+    assert cache.wait(timeout=5)
+    assert cache.failed(url, 704)
+    assert cache.get(url, 704) is None
+    assert cache.wait(timeout=5)
+    assert image_server.requests == 1
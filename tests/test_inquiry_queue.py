@@ -0,0 +1,51 @@
+import pytest
+
+from inquiry_queue import InquiryQueue, RateLimited
+
+
+def inquiry(number):
+    return {"name": "Thandi", "email": f"thandi{number}@example.com", "product_interest": "Beanie",
+            "message": f"Do you have beanie number {number} in stock?"}
+
+
+def test_rotation_never_loses_an_inquiry(tmp_path):
+    queue = InquiryQueue(tmp_path / "inquiries.jsonl", burst=1000, flush_interval=0.01, max_log_bytes=2_000)
+    try:
+        for number in range(300):
+            assert queue.submit(inquiry(number))
+            if number % 7 == 0:
+                queue.flush()
+    finally:
+        queue.close()
+    rotated = queue.rotated_logs()
+    assert len(rotated) > 10
+    assert all(path.name.endswith(".jsonl.gz") for path in rotated)
+    emails = [entry["email"] for entry in queue.read_entries()]
+    assert emails == [f"thandi{number}@example.com" for number in range(300)]
+
+
+def test_large_archive_is_reported_not_deleted(tmp_path, caplog):
+    queue = InquiryQueue(tmp_path / "inquiries.jsonl", burst=1000, flush_interval=0.01,
+                         max_log_bytes=500, archive_alert_bytes=1)
+    try:
+        for number in range(20):
+            queue.submit(inquiry(number))
+            queue.flush()
+    finally:
+        queue.close()
+    assert "None are deleted automatically" in caplog.text
+    assert len(queue.read_entries()) == 20
+
+
+def test_repeats_are_dropped_and_bursts_limited(tmp_path):
+    queue = InquiryQueue(tmp_path / "inquiries.jsonl", burst=2, flush_interval=0.01)
+    try:
+        assert queue.submit(inquiry(1), ip="10.0.0.1")
+        assert not queue.submit(inquiry(1), ip="10.0.0.2")
+        assert queue.submit(inquiry(2), ip="10.0.0.1")
+        with pytest.raises(RateLimited):
+            queue.submit(inquiry(3), ip="10.0.0.1")
+        queue.flush()
+    finally:
+        queue.close()
+    assert len((tmp_path / "inquiries.jsonl").read_text(encoding="utf-8").splitlines()) == 2
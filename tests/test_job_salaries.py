@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+from job_salaries import SalaryIndex, parse_salary
+
+
+@pytest.mark.parametrize("text, minimum, maximum", [
+    ("R8,000 - R12,000", 8000, 12000),
+    ("R15k", 15000, 15000),
+    ("R8.5k", 8500, 8500),
+    ("R 12 500", 12500, 12500),
+    ("R8 000 – R20 000", 8000, 20000),
+    ("R8,000 - 12,000", 8000, 12000),
+    ("R8 000 to 12 000 per month", 8000, 12000),
+    ("R8-12k", 8000, 12000),
+    ("Up to R5k", 0, 5000),
+    ("R150 per hour", 25950, 25950),
+    ("R120,000 per annum", 10000, 10000),
+])
+def test_amounts_are_read_as_monthly_ranges(text, minimum, maximum):
+    salary = parse_salary(text)
+    assert (salary.minimum, salary.maximum) == (minimum, maximum)
+
+
+@pytest.mark.parametrize("text", ["Stipend + Commission", "Market related", "Negotiable, R on request", ""])
+def test_text_without_an_amount_has_no_range(text):
+    salary = parse_salary(text)
+    assert not salary.numeric
+    assert (salary.minimum, salary.maximum, salary.midpoint) == (None, None, None)
+
+
+def index_of(*texts):
+    return SalaryIndex(SimpleNamespace(salaries=[parse_salary(text) for text in texts]))
+
+
+def test_paying_at_least_uses_the_bottom_of_the_range():
+    index = index_of("R8 000 – R20 000", "R19,000 - R21,000", "Stipend", "Up to R30k")
+    assert index.paying_at_least(19_000) == 0b0010
+    assert index.paying_at_least(8_000) == 0b0011
+    assert index.paying_at_least(0) == 0b1011
+    assert index.highest == 19_000
+
+
+def test_sort_by_pay_puts_salaries_without_an_amount_last():
+    index = index_of("Stipend", "R3,000 - R5,000", "R8,000 - R12,000")
+    assert index.sort_by_pay([0, 1, 2]) == [2, 1, 0]
+    assert index.sort_by_pay([0, 1, 2], highest_first=False) == [1, 2, 0]
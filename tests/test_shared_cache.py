@@ -0,0 +1,165 @@
+import json
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import job_catalog
+import shared_cache
+from application_stats import ApplicationStats
+from application_store import ApplicationStore
+from conftest import make_application
+from job_catalog import CatalogLoader
+from shared_cache import LocalBackend, RedisBackend, RespStandIn, SharedCache, SQLiteBackend, open_shared_cache
+
+JOB_OPENINGS = Path(__file__).resolve().parent.parent / "job_openings.json"
+
+
+@pytest.fixture
+def resp_server():
+    """A local Redis-protocol stand-in on a free port."""
+    server = RespStandIn("127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def redis_backend(server):
+    return RedisBackend("127.0.0.1", server.server_address[1])
+
+
+# ===== BACKENDS =====
+def test_redis_backend_round_trip(resp_server):
+    backend = redis_backend(resp_server)
+    assert backend.get("missing") is None
+    backend.set("greeting", b"sawubona")
+    assert backend.get("greeting") == b"sawubona"
+    backend.set("short-lived", b"x", ttl=0.05)
+    time.sleep(0.1)
+    assert backend.get("short-lived") is None
+    assert [backend.incr("counter") for _ in range(3)] == [1, 2, 3]
+    backend.delete("greeting")
+    assert backend.get("greeting") is None
+    backend.close()
+
+
+def test_invalidation_reaches_every_process(resp_server):
+    # Each SharedCache stands in for one server process
+    first = SharedCache(redis_backend(resp_server), check_interval=0)
+    second = SharedCache(redis_backend(resp_server), check_interval=0)
+    builds, reloads = [], []
+    second.subscribe("images", lambda: reloads.append("images"))
+    assert first.get_or_build("images", "header", lambda: builds.append(1) or "first") == "first"
+    assert second.get_or_build("images", "header", lambda: builds.append(1) or "second") == "first"
+    assert len(builds) == 1
+
+    first.invalidate("images")
+    second.poll()
+    assert reloads == ["images"]
+    assert second.get_or_build("images", "header", lambda: "rebuilt") == "rebuilt"
+
+
+def test_a_cache_outage_is_a_miss_not_an_error(resp_server):
+    backend = redis_backend(resp_server)
+    cache = SharedCache(backend, check_interval=0)
+    cache.set("images", "header", b"bytes")
+    resp_server.shutdown()
+    resp_server.server_close()
+    backend.close()
+    assert cache.get("images", "header") is None
+    assert cache.get_or_build("images", "header", lambda: "built") == "built"
+
+
+def test_invalidation_deletes_the_entries_it_replaces():
+    backend = LocalBackend()
+    cache = SharedCache(backend, check_interval=0)
+    cache.get_or_build("images", "header", lambda: "first")
+    assert backend.get("images:v0:header") is not None
+    cache.invalidate("images")
+    assert backend.get("images:v0:header") is None
+
+
+def test_entries_left_by_other_processes_expire_and_are_purged(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, "PURGE_INTERVAL", 0)
+    backend = SQLiteBackend(tmp_path / "cache.db")
+    other = SharedCache(backend, check_interval=0, default_ttl=0.05)
+    other.set("application-stats", "counts:1", b"counts")
+    cache = SharedCache(backend, check_interval=0)
+    cache.invalidate("application-stats")
+    time.sleep(0.1)
+    cache.poll()
+    keys = [key for (key,) in backend._conn.execute("SELECT key FROM shared_cache")]
+    assert keys == ["version:application-stats"]
+
+
+def test_a_burst_of_writes_sends_one_invalidation(store):
+    backend = LocalBackend()
+    cache = SharedCache(backend, check_interval=0)
+    stats = ApplicationStats(store, shared_cache=cache)
+    for number in range(50):
+        store.add_many([make_application(2000 + number)])
+    assert int(backend.get("version:application-stats")) == 1
+    cache.flush_invalidations()
+    assert int(backend.get("version:application-stats")) == 2
+    assert stats.total == 55
+
+
+def test_open_shared_cache_urls(tmp_path):
+    assert open_shared_cache("", tmp_path / "cache.db") is None
+    assert isinstance(open_shared_cache("sqlite://", tmp_path / "cache.db").backend, SQLiteBackend)
+    assert isinstance(open_shared_cache("redis://cache:6380/2", tmp_path / "cache.db").backend, RedisBackend)
+    with pytest.raises(ValueError):
+        open_shared_cache("memcached://cache", tmp_path / "cache.db")
+
+
+# ===== STATS ACROSS IMPORTS =====
+def test_stats_pick_up_an_import_in_the_same_process(store):
+    stats = ApplicationStats(store, shared_cache=SharedCache(LocalBackend(), check_interval=0))
+    assert stats.total == 5
+    store.upsert_many([make_application(2000 + i, status="Offer") for i in range(3)])
+    assert stats.total == 8
+    assert stats.status_count("Offer") == 3
+
+
+def test_stats_pick_up_an_import_from_the_cli(store, db_path):
+    backend = LocalBackend()
+    stats = ApplicationStats(store, shared_cache=SharedCache(backend, check_interval=0))
+    other_store = ApplicationStore(db_path)
+    other = ApplicationStats(other_store, shared_cache=SharedCache(backend, check_interval=0))
+    cli_store = ApplicationStore(db_path)
+    cli_store.upsert_many([make_application(2000 + i) for i in range(4)])
+    cli_store.close()
+    stats.refresh_if_stale()
+    other.refresh_if_stale()
+    assert stats.total == other.total == 9
+    other_store.close()
+
+
+# ===== CATALOG ACROSS PROCESSES =====
+def test_an_edited_catalog_is_built_by_one_process_only(tmp_path, monkeypatch):
+    path = tmp_path / "job_openings.json"
+    shutil.copy(JOB_OPENINGS, path)
+    builds = []
+
+    def counting_parse(raw, source="job openings"):
+        builds.append(source)
+        return parse_catalog(raw, source)
+
+    parse_catalog = job_catalog.parse_catalog
+    monkeypatch.setattr(job_catalog, "parse_catalog", counting_parse)
+    backend = LocalBackend()  # two SharedCaches on one backend stand in for two processes
+    first = CatalogLoader(path, check_interval=0, shared_cache=SharedCache(backend, check_interval=0))
+    second = CatalogLoader(path, check_interval=3600, shared_cache=SharedCache(backend, check_interval=0))
+    assert len(builds) == 1
+
+    openings = json.loads(path.read_text(encoding="utf-8"))
+    category = next(iter(openings))
+    openings[category].append(dict(openings[category][0], title="Crochet Pattern Tester"))
+    path.write_text(json.dumps(openings), encoding="utf-8")
+
+    assert "Crochet Pattern Tester" in first.current().titles
+    assert "Crochet Pattern Tester" in second.current().titles
+    assert len(builds) == 2
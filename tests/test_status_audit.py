@@ -0,0 +1,75 @@
+import csv
+import sqlite3
+
+import pytest
+
+from application_io import import_applications
+from application_store import ApplicationStore
+from conftest import make_application
+
+
+def test_bulk_update_is_audited_as_one_batch(store):
+    changed = store.bulk_update_status(
+        ["KFB-APP1000", "KFB-APP1001"], "Under Review", ["New"], actor="admin", reason="spring intake",
+    )
+    assert sorted(app["Application ID"] for app in changed) == ["KFB-APP1000", "KFB-APP1001"]
+    audit = store.audit_log()
+    assert [entry["Application ID"] for entry in audit] == ["KFB-APP1001", "KFB-APP1000"]
+    assert {entry["By"] for entry in audit} == {"admin"}
+    assert {entry["Reason"] for entry in audit} == {"spring intake"}
+    assert len({entry["Batch"] for entry in audit}) == 1
+
+
+def test_imported_status_changes_are_audited(store, tmp_path):
+    path = tmp_path / "applications.csv"
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.DictWriter(out, fieldnames=list(make_application(0)))
+        writer.writeheader()
+        writer.writerows([make_application(1002, status="Rejected"), make_application(1005)])
+    import_applications(store, path)
+    audit = store.audit_log(app_id="KFB-APP1002")
+    assert len(audit) == 1
+    assert (audit[0]["From"], audit[0]["To"], audit[0]["By"]) == ("New", "Rejected", "import")
+    assert audit[0]["Reason"] == "imported from applications.csv"
+
+
+def test_status_history_is_append_only(store):
+    store.update_status("KFB-APP1003", "Under Review", actor="admin")
+    with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+        store._conn.execute("UPDATE status_events SET actor = 'someone else'")
+    with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+        store._conn.execute("DELETE FROM status_events")
+    assert store.audit_log()[0]["By"] == "admin"
+
+
+def test_separate_audit_table_is_merged_into_status_history(db_path):
+    store = ApplicationStore(db_path)
+    store.seed([make_application(1000)])
+    store.update_status("KFB-APP1000", "Under Review")
+    store.close()
+    # Lay the database out as it was before the audit columns moved into status_events
+    conn = sqlite3.connect(db_path)
+    row = conn.execute("SELECT app_id, old_status, new_status, changed_at FROM status_events").fetchone()
+    conn.executescript(
+        "DROP TRIGGER status_events_no_update; DROP TRIGGER status_events_no_delete;"
+        "ALTER TABLE status_events DROP COLUMN batch_id; ALTER TABLE status_events DROP COLUMN actor;"
+        "ALTER TABLE status_events DROP COLUMN reason;"
+        "CREATE TABLE status_audit (id INTEGER PRIMARY KEY AUTOINCREMENT, batch_id TEXT, app_id TEXT,"
+        " old_status TEXT, new_status TEXT, changed_at TEXT, actor TEXT, reason TEXT);"
+    )
+    conn.execute(
+        "INSERT INTO status_audit (batch_id, app_id, old_status, new_status, changed_at, actor, reason) "
+        "VALUES ('b1', ?, ?, ?, ?, 'admin', 'screened')",
+        row,
+    )
+    conn.commit()
+    conn.close()
+
+    store = ApplicationStore(db_path)
+    try:
+        audit = store.audit_log()
+        assert [(entry["Batch"], entry["By"], entry["Reason"]) for entry in audit] == [("b1", "admin", "screened")]
+        tables = {name for (name,) in store._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "status_audit" not in tables
+    finally:
+        store.close()
@@ -0,0 +1,104 @@
+import io
+import json
+
+from application_store import ApplicationStore
+from batch_writer import BatchWriter
+from conftest import make_application
+from resume_storage import ResumeStore
+from submission_pipeline import SubmissionPipeline
+
+
+def submitted(number):
+    record = make_application(number)
+    del record["Application ID"], record["Status"], record["Applied Date"]
+    return record
+
+
+def test_pipelines_in_two_processes_never_share_an_application_id(store, db_path, tmp_path):
+    # Two stores on one file stand in for two server processes
+    other_store = ApplicationStore(db_path)
+    first = SubmissionPipeline(store, ResumeStore(tmp_path / "resumes"), flush_interval=0.05)
+    second = SubmissionPipeline(other_store, ResumeStore(tmp_path / "resumes"), flush_interval=0.05)
+    try:
+        ids = []
+        for i in range(20):
+            ids.append(first.submit(submitted(i)))
+            ids.append(second.submit(submitted(100 + i)))
+        first.flush()
+        second.flush()
+    finally:
+        first.close()
+        second.close()
+    assert len(set(ids)) == 40
+    assert all(app_id in store for app_id in ids)
+    assert len(store) == 45
+    other_store.close()
+
+
+def test_new_ids_continue_after_an_import_from_another_process(store, db_path, tmp_path):
+    importer = ApplicationStore(db_path)
+    importer.upsert_many([make_application(1005 + i) for i in range(3)])
+    importer.close()
+    pipeline = SubmissionPipeline(store, ResumeStore(tmp_path / "resumes"), flush_interval=0.05)
+    try:
+        app_id = pipeline.submit(submitted(1))
+        pipeline.flush()
+    finally:
+        pipeline.close()
+    assert app_id == "KFB-APP1008"
+    assert store.get(app_id)["Applicant"] == "Applicant 1"
+
+
+def test_a_failing_application_is_dead_lettered_without_losing_its_batch(store, db_path, tmp_path):
+    dead_letters = tmp_path / "applications_failed.jsonl"
+    pipeline = SubmissionPipeline(
+        store, ResumeStore(tmp_path / "resumes"), dead_letters, batch_size=10, flush_interval=0.5
+    )
+    try:
+        ids = [pipeline.submit(submitted(i)) for i in range(3)]
+        # Another process writes one of the reserved IDs before the batch commits
+        importer = ApplicationStore(db_path)
+        importer.add(make_application(int(ids[1].removeprefix("KFB-APP")), Applicant="Someone else"))
+        importer.close()
+        pipeline.flush()
+    finally:
+        pipeline.close()
+    assert store.get(ids[0])["Applicant"] == "Applicant 0"
+    assert store.get(ids[1])["Applicant"] == "Someone else"
+    assert store.get(ids[2])["Applicant"] == "Applicant 2"
+    failed = [json.loads(line) for line in dead_letters.read_text(encoding="utf-8").splitlines()]
+    assert [entry["Application ID"] for entry in failed] == [ids[1]]
+    assert "UNIQUE constraint failed" in failed[0]["error"]
+
+
+def test_a_resume_that_cannot_be_saved_is_flagged_on_the_application(store, tmp_path):
+    pipeline = SubmissionPipeline(store, ResumeStore(tmp_path / "resumes", max_file_bytes=10), flush_interval=0.01)
+    resume = io.BytesIO(b"%PDF-1.4 " + b"x" * 100)
+    resume.name = "cv.pdf"
+    try:
+        app_id = pipeline.submit(submitted(1), resume=resume)
+        pipeline.flush()
+    finally:
+        pipeline.close()
+    assert app_id in store
+    [(record, reason)] = store.missing_resumes()
+    assert record["Application ID"] == app_id
+    assert reason.startswith("cv.pdf: Resume is larger than")
+
+
+def test_batch_writer_retries_items_one_at_a_time():
+    written, dead = [], []
+
+    def write_batch(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        written.extend(items)
+
+    writer = BatchWriter(write_batch, batch_size=10, flush_interval=0.2,
+                         dead_letter=lambda item, error: dead.append((item, str(error))))
+    for item in ["a", "bad", "b"]:
+        writer.put(item)
+    writer.flush()
+    writer.close()
+    assert written == ["a", "b"]
+    assert dead == [("bad", "bad item")]
@@ -0,0 +1,43 @@
+import threading
+
+from application_stats import ApplicationStats
+from conftest import make_application
+from warm_snapshot import WarmStart, read_snapshot
+
+
+def test_counts_snapshot_does_not_wait_for_the_store_lock(store):
+    result = []
+    with store._lock:
+        reader = threading.Thread(target=lambda: result.append(store.counts_snapshot()))
+        reader.start()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+    generation, by_status, by_position = result[0]
+    assert generation == store.generation()
+    assert by_status == {"New": 5}
+    assert by_position == {"Lead Crochet Artisan": 5}
+
+
+def test_save_is_skipped_while_the_store_is_unchanged(store, tmp_path):
+    stats = ApplicationStats(store)
+    calls = []
+
+    def snapshot_state():
+        calls.append(store.generation())
+        return stats.snapshot_state()
+
+    warm_start = WarmStart(tmp_path / "warm.snapshot", interval=0)
+    warm_start.register("application_stats", snapshot_state, version=store.generation)
+    try:
+        assert warm_start.save() > 0
+        assert warm_start.save() == 0
+        assert len(calls) == 1
+
+        store.add_many([make_application(1005, status="Offer")])
+        assert warm_start.save() > 0
+        assert len(calls) == 2
+        state = read_snapshot(warm_start.path)["application_stats"]["state"]
+        assert state[0] == store.generation()
+        assert state[1]["Offer"] == 1
+    finally:
+        warm_start.close()
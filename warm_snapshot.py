@@ -0,0 +1,241 @@
+"""
+Kwazi's Fiber Bliss - Warm Start Snapshots
+Precomputed caches saved to one versioned binary file on a timer and at
+exit, and mapped back in when the next server process starts
+"""
+
+import atexit
+import hashlib
+import importlib
+import itertools
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KFBSNAP\x00"
+# Bump when the file layout changes; files written by other versions are ignored
+SNAPSHOT_VERSION = 1
+ALIGNMENT = 64                    # out-of-band buffers start on this boundary
+SAVE_INTERVAL = 300.0             # seconds between background saves
+_PREFIX = struct.Struct("<8sI")   # magic, length of the JSON header that follows
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, damaged or from another version."""
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+# ===== FILE FORMAT =====
+# magic | header length | JSON header | padding | pickle | padding | buffer | padding | buffer ...
+# Offsets in the header count from the first aligned byte after it.
+def write_snapshot(path, sections):
+    """Pickle ``sections`` with protocol 5 into ``path`` and return the bytes written.
+
+    Objects that support out-of-band pickling (numpy arrays, ``PickleBuffer``
+    such as ``pack_texts`` makes) are written after the pickle stream as
+    raw, aligned buffers, so loading maps them instead of copying them. The
+    file is written beside ``path`` and renamed over it, so a reader never
+    sees half a snapshot.
+    """
+    path = Path(path)
+    buffers = []
+    payload = pickle.dumps(sections, protocol=5, buffer_callback=buffers.append)
+    raws = [buffer.raw() for buffer in buffers]
+    layout = []
+    offset = _aligned(len(payload))
+    for raw in raws:
+        layout.append([offset, raw.nbytes])
+        offset = _aligned(offset + raw.nbytes)
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "python": list(sys.version_info[:2]),
+        "created": time.time(),
+        "pickle": len(payload),
+        "buffers": layout,
+    }).encode("utf-8")
+
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as snapshot:
+        snapshot.write(_PREFIX.pack(MAGIC, len(header)))
+        snapshot.write(header)
+        snapshot.write(b"\0" * (_aligned(snapshot.tell()) - snapshot.tell()))
+        start = snapshot.tell()
+        snapshot.write(payload)
+        for (offset, _), raw in zip(layout, raws):
+            snapshot.write(b"\0" * (start + offset - snapshot.tell()))
+            snapshot.write(raw)
+        size = snapshot.tell()
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temporary, path)
+    return size
+
+
+def read_snapshot(path):
+    """Map a snapshot file and unpickle its sections.
+
+    Out-of-band buffers come back as read-only views of the mapping rather
+    than copies; the mapping stays open for as long as anything uses them.
+    Raises SnapshotError if the file is missing, damaged, or was written by
+    another snapshot version or Python version.
+    """
+    try:
+        with open(path, "rb") as snapshot:
+            mapped = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as error:
+        raise SnapshotError(f"Can't map {path}: {error}") from None
+    view = memoryview(mapped)
+    try:
+        magic, header_length = _PREFIX.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a snapshot file")
+        header = json.loads(bytes(view[_PREFIX.size:_PREFIX.size + header_length]))
+        if header["version"] != SNAPSHOT_VERSION or header["python"] != list(sys.version_info[:2]):
+            raise SnapshotError(
+                f"{path} was written by snapshot version {header['version']} on Python "
+                f"{'.'.join(map(str, header['python']))}"
+            )
+        start = _aligned(_PREFIX.size + header_length)
+        if start + max([header["pickle"]] + [offset + size for offset, size in header["buffers"]]) > len(view):
+            raise SnapshotError(f"{path} is truncated")
+        buffers = [view[start + offset:start + offset + size] for offset, size in header["buffers"]]
+        return pickle.loads(view[start:start + header["pickle"]], buffers=buffers)
+    except SnapshotError:
+        raise
+    except Exception as error:
+        raise SnapshotError(f"{path} is damaged: {error!r}") from None
+
+
+def pack_texts(texts):
+    """Many strings as one out-of-band buffer plus end offsets; ``unpack_texts`` reverses it."""
+    encoded = [text.encode("utf-8") for text in texts]
+    return pickle.PickleBuffer(bytearray(b"".join(encoded))), list(itertools.accumulate(map(len, encoded)))
+
+
+def unpack_texts(buffer, ends):
+    view = memoryview(buffer)
+    return [
+        str(view[start:end], "utf-8")
+        for start, end in zip(itertools.chain([0], ends), ends)
+    ]
+
+
+def code_version(module_names):
+    """Hash of the source of the named modules; a snapshot section is only reused by the same code."""
+    digest = hashlib.sha1()
+    for name in module_names:
+        digest.update(Path(importlib.import_module(name).__file__).read_bytes())
+    return digest.hexdigest()
+
+
+# ===== WARM START =====
+class WarmStart:
+    """Caches handed over from the previous server process and saved for the next one.
+
+    At startup the snapshot at ``path`` is mapped in. ``restore(name,
+    depends_on)`` returns one section of it, or None if it is missing or
+    the source of the ``depends_on`` modules (by name) changed since it was saved;
+    the caller still checks the state matches its data (the catalog file
+    hash, the store's generation). ``register(name, save, depends_on,
+    version)`` adds a function returning a section's current state.
+    ``save()`` writes the registered sections every ``interval`` seconds on
+    a daemon thread and once more at exit, skipping the write when no
+    section's ``version`` has changed. Sections restored but not yet asked
+    for again are carried over unchanged.
+    """
+
+    def __init__(self, path, interval=SAVE_INTERVAL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.last_error = None
+        self.last_saved = None
+        self.restored_names = []
+        self._savers = {}
+        self._saved = {}                  # name -> (version, section) last written
+        self._lock = threading.Lock()
+        started = time.perf_counter()
+        try:
+            self._sections = read_snapshot(self.path)
+        except SnapshotError as error:
+            logger.info("Starting cold: %s", error)
+            self._sections = {}
+        self.load_seconds = time.perf_counter() - started
+        self._stop = threading.Event()
+        if interval:
+            threading.Thread(target=self._run, name="warm-start-saver", daemon=True).start()
+        atexit.register(self.close)
+
+    def restore(self, name, depends_on=()):
+        """The state saved for ``name`` by an earlier process, or None."""
+        section = self._sections.pop(name, None)
+        if section is None or section["code"] != code_version(depends_on):
+            return None
+        self.restored_names.append(name)
+        return section["state"]
+
+    def register(self, name, save, depends_on=(), version=None):
+        """Include ``save()`` (returning picklable state, or None to skip) in every snapshot.
+
+        ``version`` is a cheap function whose result changes whenever the
+        state does (a store generation, a file hash). When it returns what
+        it did at the last snapshot, the section written then is reused and
+        ``save`` isn't called.
+        """
+        self._savers[name] = (save, code_version(depends_on), version)
+
+    def save(self):
+        """Write the registered sections and return the size of the file, or 0 if nothing changed."""
+        sections = dict(self._sections)
+        saved = {}
+        changed = False
+        for name, (save, code, version) in list(self._savers.items()):
+            try:
+                current = version() if version is not None else None
+                if current is not None and name in self._saved and self._saved[name][0] == current:
+                    sections[name] = self._saved[name][1]
+                    continue
+                state = save()
+            except Exception:
+                logger.exception("Couldn't snapshot %s", name)
+                continue
+            changed = True
+            if state is not None:
+                sections[name] = {"code": code, "state": state}
+                if version is not None:
+                    saved[name] = (current, sections[name])
+        if not sections or not changed:
+            return 0
+        with self._lock:
+            try:
+                size = write_snapshot(self.path, sections)
+            except (OSError, TypeError, pickle.PicklingError) as error:
+                self.last_error = str(error)
+                logger.warning("Couldn't write snapshot %s: %s", self.path, error)
+                return 0
+        self._saved.update(saved)
+        self.last_error = None
+        self.last_saved = time.time()
+        return size
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.save()
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self.save()